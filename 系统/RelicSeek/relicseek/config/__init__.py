@@ -3,6 +3,6 @@ RelicSeek Config - 配置管理模块
 """
 
 from .settings import Settings
-from .prompt_manager import PromptManager
+from .prompt_manager import PromptManager, get_prompt_manager
 
-__all__ = ["Settings", "PromptManager"]
+__all__ = ["Settings", "PromptManager", "get_prompt_manager"]
@@ -1,46 +1,135 @@
 """
 Prompt管理模块
 """
-import json
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Callable, TypeVar
 from string import Template
 
+from .serialization import load_json_file
+
+
+# 项目根目录，模块导入时解析一次
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def _compile_template(content: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    将模板预先拆分为(文本, 变量名)片段，语义与Template.safe_substitute一致
+    
+    变量名为None的片段是字面文本；否则文本为占位符原文，变量缺失时原样保留
+    """
+    parts: List[Tuple[str, Optional[str]]] = []
+    literal: List[str] = []
+    pos = 0
+    for match in Template.pattern.finditer(content):
+        literal.append(content[pos:match.start()])
+        pos = match.end()
+        name = match.group('named') or match.group('braced')
+        if name is not None:
+            parts.append((''.join(literal), None))
+            literal = []
+            parts.append((match.group(), name))
+        elif match.group('escaped') is not None:
+            literal.append(Template.delimiter)
+        else:
+            # 无效占位符原样保留
+            literal.append(match.group())
+    literal.append(content[pos:])
+    parts.append((''.join(literal), None))
+    return [part for part in parts if part[0]]
+
+
+_F = TypeVar('_F', bound=Callable[..., Any])
+
+
+def _requires_config(method: _F) -> _F:
+    """确保调用前prompt配置已加载（已加载时只读取一个布尔标志）"""
+    @wraps(method)
+    def wrapper(self: "PromptManager", *args: Any, **kwargs: Any) -> Any:
+        if not self._loaded:
+            self._ensure_loaded()
+        return method(self, *args, **kwargs)
+    return wrapper  # type: ignore[return-value]
+
 
 class PromptTemplate:
     """Prompt模板类"""
     
+    __slots__ = (
+        'name', 'file_path', 'description', 'input_variables', 'output_format',
+        '_abs_path', '_template_content', '_compiled'
+    )
+    
     def __init__(self, name: str, file_path: str, description: str, 
-                 input_variables: List[str], output_format: str):
+                 input_variables: List[str], output_format: str, prompts_dir: Path):
         self.name = name
         self.file_path = file_path
+        # 模板文件的完整路径在创建时一次性解析
+        self._abs_path = str(prompts_dir / file_path)
         self.description = description
         self.input_variables = input_variables
         self.output_format = output_format
         self._template_content: Optional[str] = None
+        self._compiled: Optional[List[Tuple[str, Optional[str]]]] = None
     
-    def load_template(self, prompts_dir: Path) -> str:
+    def load_template(self) -> str:
         """加载模板内容"""
         if self._template_content is None:
-            template_file = prompts_dir / self.file_path
-            if template_file.exists():
-                with open(template_file, 'r', encoding='utf-8') as f:
-                    self._template_content = f.read()
-            else:
-                raise FileNotFoundError(f"Prompt模板文件不存在: {template_file}")
+            try:
+                with open(self._abs_path, 'r', encoding='utf-8') as f:
+                    self._set_content(f.read())
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Prompt模板文件不存在: {self._abs_path}")
         return self._template_content
     
-    def format(self, prompts_dir: Path, **kwargs) -> str:
+    def _read_from(self, path: str) -> None:
+        """从指定路径读取模板内容"""
+        with open(path, 'r', encoding='utf-8') as f:
+            self._set_content(f.read())
+    
+    def _set_content(self, content: str) -> None:
+        """设置模板内容并预编译模板"""
+        # 先写入编译结果再发布内容：预热线程填充模板时，其他线程看到内容即可使用编译结果
+        self._compiled = _compile_template(content)
+        self._template_content = content
+    
+    def format(self, **kwargs) -> str:
         """格式化模板"""
-        template_content = self.load_template(prompts_dir)
-        template = Template(template_content)
+        self.load_template()
         
-        # 检查是否提供了所有必需的变量
-        missing_vars = set(self.input_variables) - set(kwargs.keys())
-        if missing_vars:
-            raise ValueError(f"缺少必需的模板变量: {missing_vars}")
+        # 检查是否提供了所有必需的变量（系统prompt没有变量，无需检查）
+        if self.input_variables:
+            missing_vars = set(self.input_variables).difference(kwargs)
+            if missing_vars:
+                raise ValueError(f"缺少必需的模板变量: {missing_vars}")
         
-        return template.safe_substitute(**kwargs)
+        return ''.join(
+            text if name is None or name not in kwargs else str(kwargs[name])
+            for text, name in self._compiled
+        )
+
+
+class SystemPromptTemplate(PromptTemplate):
+    """系统prompt模板，不带变量，输出为自然语言"""
+    
+    __slots__ = ()
+    
+    # 所有系统prompt共用的类级默认值，不在实例上重复存储
+    input_variables = ()
+    output_format = "natural"
+    
+    def __init__(self, name: str, file_path: str, description: str, prompts_dir: Path):
+        self.name = name
+        self.file_path = file_path
+        self._abs_path = str(prompts_dir / file_path)
+        self.description = description
+        self._template_content = None
+        self._compiled = None
 
 
 class PromptManager:
@@ -55,112 +144,199 @@ class PromptManager:
             prompts_dir: Prompt文件目录
         """
         if config_dir is None:
-            project_root = Path(__file__).parent.parent.parent
-            config_dir = project_root / "config"
+            config_dir = _PROJECT_ROOT / "config"
         
         if prompts_dir is None:
-            project_root = Path(__file__).parent.parent.parent
-            prompts_dir = project_root / "prompts"
+            prompts_dir = _PROJECT_ROOT / "prompts"
         
         self.config_dir = Path(config_dir)
         self.prompts_dir = Path(prompts_dir)
+        self._config_data: Dict[str, Any] = {}
+        # 模板对象在首次使用时才创建
         self._prompts: Dict[str, PromptTemplate] = {}
         self._system_prompts: Dict[str, PromptTemplate] = {}
+        # 系统prompt不带变量，渲染结果可以直接缓存
+        self._system_prompt_cache: Dict[str, str] = {}
+        self._prewarm_futures: Optional[List[Future]] = None
+        self._load_lock = threading.RLock()
         self._loaded = False
     
     def load_prompts_config(self) -> None:
         """加载prompt配置"""
+        self._ensure_loaded()
+    
+    def _ensure_loaded(self) -> None:
+        """双重检查加锁，保证多线程下配置只加载一次"""
         if self._loaded:
             return
-            
+        with self._load_lock:
+            if not self._loaded:
+                self._read_config()
+    
+    def _read_config(self) -> None:
+        """读取prompt配置文件"""
         config_file = self.config_dir / "prompts_config.json"
         if not config_file.exists():
             raise FileNotFoundError(f"Prompt配置文件不存在: {config_file}")
         
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config_data = json.load(f)
+        self._config_data = load_json_file(config_file)
         
-        # 加载普通prompts
-        for name, config in config_data.get("prompts", {}).items():
-            self._prompts[name] = PromptTemplate(
+        self._loaded = True
+    
+    def _get_template(self, name: str) -> Optional[PromptTemplate]:
+        """获取普通prompt模板，首次访问时根据配置创建"""
+        template = self._prompts.get(name)
+        if template is None:
+            config = self._config_data.get("prompts", {}).get(name)
+            if config is None:
+                return None
+            template = PromptTemplate(
                 name=name,
                 file_path=config["file"],
                 description=config["description"],
                 input_variables=config["input_variables"],
-                output_format=config["output_format"]
+                output_format=config["output_format"],
+                prompts_dir=self.prompts_dir
             )
-        
-        # 加载系统prompts
-        for name, config in config_data.get("system_prompts", {}).items():
-            self._system_prompts[name] = PromptTemplate(
+            template = self._prompts.setdefault(name, template)
+        return template
+    
+    def _get_system_template(self, name: str) -> Optional[SystemPromptTemplate]:
+        """获取系统prompt模板，首次访问时根据配置创建"""
+        template = self._system_prompts.get(name)
+        if template is None:
+            config = self._config_data.get("system_prompts", {}).get(name)
+            if config is None:
+                return None
+            template = SystemPromptTemplate(
                 name=name,
                 file_path=config["file"],
                 description=config["description"],
-                input_variables=[],  # 系统prompt通常不需要变量
-                output_format="natural"
+                prompts_dir=self.prompts_dir
             )
+            template = self._system_prompts.setdefault(name, template)
+        return template
+    
+    def preload_templates(self) -> None:
+        """创建所有已注册的模板并预先读取模板文件"""
+        for template, path in self._pending_template_reads():
+            template._read_from(path)
+    
+    def prewarm(self) -> List[Future]:
+        """
+        在后台线程池中预读所有模板文件，不阻塞调用方
         
-        self._loaded = True
+        Returns:
+            各模板读取任务的Future列表
+        """
+        with self._load_lock:
+            if self._prewarm_futures is None:
+                executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prompt-prewarm")
+                self._prewarm_futures = [
+                    executor.submit(template._read_from, path)
+                    for template, path in self._pending_template_reads()
+                ]
+                executor.shutdown(wait=False)
+            return self._prewarm_futures
     
+    @_requires_config
+    def _pending_template_reads(self) -> List[Tuple[PromptTemplate, str]]:
+        """
+        列出尚未加载内容的模板及其文件路径
+        
+        按目录分组，每个目录只扫描一次；缺失的模板文件在此跳过，
+        实际使用时仍会抛出FileNotFoundError
+        """
+        templates = [self._get_template(name) for name in self.list_prompts()]
+        templates += [self._get_system_template(name) for name in self.list_system_prompts()]
+        
+        by_dir: Dict[str, List[PromptTemplate]] = defaultdict(list)
+        for template in templates:
+            if template._template_content is None:
+                by_dir[os.path.dirname(template._abs_path)].append(template)
+        
+        pending: List[Tuple[PromptTemplate, str]] = []
+        for directory, dir_templates in by_dir.items():
+            try:
+                with os.scandir(directory) as entries:
+                    existing = {entry.name: entry.path for entry in entries if entry.is_file()}
+            except FileNotFoundError:
+                continue
+            
+            for template in dir_templates:
+                path = existing.get(os.path.basename(template._abs_path))
+                if path is not None:
+                    pending.append((template, path))
+        return pending
+    
+    @_requires_config
     def get_prompt(self, name: str, **kwargs) -> str:
         """获取格式化的prompt"""
-        if not self._loaded:
-            self.load_prompts_config()
-        
-        if name not in self._prompts:
+        template = self._get_template(name)
+        if template is None:
             raise ValueError(f"未找到名为 '{name}' 的prompt模板")
         
-        template = self._prompts[name]
-        return template.format(self.prompts_dir, **kwargs)
+        return template.format(**kwargs)
     
+    @_requires_config
     def get_system_prompt(self, name: str) -> str:
         """获取系统prompt"""
-        if not self._loaded:
-            self.load_prompts_config()
+        cached = self._system_prompt_cache.get(name)
+        if cached is not None:
+            return cached
         
-        if name not in self._system_prompts:
+        template = self._get_system_template(name)
+        if template is None:
             raise ValueError(f"未找到名为 '{name}' 的系统prompt模板")
         
-        template = self._system_prompts[name]
-        return template.format(self.prompts_dir)
+        content = template.format()
+        self._system_prompt_cache[name] = content
+        return content
     
+    @_requires_config
     def list_prompts(self) -> List[str]:
         """列出所有可用的prompt"""
-        if not self._loaded:
-            self.load_prompts_config()
-        return list(self._prompts.keys())
+        return list(self._config_data.get("prompts", {}).keys())
     
+    @_requires_config
     def list_system_prompts(self) -> List[str]:
         """列出所有可用的系统prompt"""
-        if not self._loaded:
-            self.load_prompts_config()
-        return list(self._system_prompts.keys())
+        return list(self._config_data.get("system_prompts", {}).keys())
     
+    @_requires_config
     def get_prompt_info(self, name: str) -> Dict[str, Any]:
         """获取prompt信息"""
-        if not self._loaded:
-            self.load_prompts_config()
-        
-        if name in self._prompts:
-            template = self._prompts[name]
-        elif name in self._system_prompts:
-            template = self._system_prompts[name]
-        else:
+        template = self._get_template(name) or self._get_system_template(name)
+        if template is None:
             raise ValueError(f"未找到名为 '{name}' 的prompt模板")
         
         return {
             "name": template.name,
             "description": template.description,
-            "input_variables": template.input_variables,
+            "input_variables": list(template.input_variables),
             "output_format": template.output_format,
             "file_path": template.file_path
         }
     
     def reload_prompts(self) -> None:
         """重新加载prompt配置"""
-        self._prompts.clear()
-        self._system_prompts.clear()
-        self._loaded = False
-        # 清除已缓存的模板内容
-        for template in list(self._prompts.values()) + list(self._system_prompts.values()):
-            template._template_content = None
+        # 丢弃模板对象即可清除其缓存的模板内容，下次访问时会重新创建
+        with self._load_lock:
+            self._loaded = False
+            self._config_data = {}
+            self._prompts = {}
+            self._system_prompts = {}
+            self._system_prompt_cache = {}
+            self._prewarm_futures = None
+
+
+@lru_cache(maxsize=1)
+def get_prompt_manager() -> PromptManager:
+    """
+    获取进程内共享的默认Prompt管理器
+    
+    首次调用时加载配置，之后的调用直接复用；模板文件由prewarm()在后台预读
+    """
+    prompt_manager = PromptManager()
+    prompt_manager.load_prompts_config()
+    return prompt_manager
@@ -0,0 +1,54 @@
+"""
+JSON序列化工具
+
+安装了orjson时使用orjson，否则回退到标准库json
+"""
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson为可选依赖
+    orjson = None
+    import json
+
+
+def json_dumps(obj: Any, indent: bool = False,
+               default: Optional[Callable[[Any], Any]] = None) -> str:
+    """
+    序列化为JSON字符串（保留非ASCII字符）
+    
+    Args:
+        obj: 要序列化的对象
+        indent: 是否按两个空格缩进
+        default: 无法直接序列化的对象的转换函数
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None, default=default)
+
+
+def json_dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """序列化为UTF-8编码的JSON字节串，可直接写入二进制文件"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """解析JSON字符串或字节串"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_json_file(path: Union[str, Path]) -> Any:
+    """以二进制方式一次读取并解析JSON文件，省去文本解码层"""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
@@ -7,6 +7,12 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 from pydantic import BaseModel, Field
 
+from .serialization import load_json_file
+
+
+# 项目根目录，模块导入时解析一次
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
 
 class ModelConfig(BaseModel):
     """大语言模型配置"""
@@ -68,6 +74,14 @@ class EngineConfig(BaseModel):
     agent: AgentConfig = Field(default_factory=AgentConfig)
     search: SearchConfig = Field(default_factory=SearchConfig)
     searxng: SearxngConfig = Field(default_factory=SearxngConfig)
+    
+    def status_snapshot(self) -> Dict[str, Any]:
+        """模型、智能体和搜索配置的JSON快照，用于引擎状态展示（每次调用生成新的字典）"""
+        return {
+            'model': self.model.model_dump(mode='json'),
+            'agent': self.agent.model_dump(mode='json'),
+            'search': self.search.model_dump(mode='json')
+        }
 
 
 class Settings:
@@ -81,84 +95,91 @@ class Settings:
             config_dir: 配置文件目录路径，默认为项目根目录的config文件夹
         """
         if config_dir is None:
-            # 获取项目根目录
-            project_root = Path(__file__).parent.parent.parent
-            config_dir = project_root / "config"
+            config_dir = _PROJECT_ROOT / "config"
         
         self.config_dir = Path(config_dir)
         self._engine_config: Optional[EngineConfig] = None
         self._logging_config: Optional[LoggingConfig] = None
         self._cache_config: Optional[CacheConfig] = None
+        self._searxng_config: Optional[Dict[str, Any]] = None
+        self._raw_config: Optional[Dict[str, Any]] = None
+        self._api_key: Optional[str] = None
+        self._api_base: Optional[str] = None
+        self._api_base_resolved = False
         
-    def load_engine_config(self) -> EngineConfig:
-        """加载引擎配置"""
-        if self._engine_config is None:
+    def _load_raw(self) -> Dict[str, Any]:
+        """读取并缓存engine_config.json的原始内容，供各load_*_config共享"""
+        if self._raw_config is None:
             config_file = self.config_dir / "engine_config.json"
             if config_file.exists():
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                    self._engine_config = EngineConfig(**config_data.get("engine", {}))
+                self._raw_config = load_json_file(config_file)
             else:
-                self._engine_config = EngineConfig()
+                self._raw_config = {}
+        return self._raw_config
+    
+    def load_engine_config(self) -> EngineConfig:
+        """加载引擎配置"""
+        if self._engine_config is None:
+            self._engine_config = EngineConfig(**self._load_raw().get("engine", {}))
         return self._engine_config
     
     def load_logging_config(self) -> LoggingConfig:
         """加载日志配置"""
         if self._logging_config is None:
-            config_file = self.config_dir / "engine_config.json"
-            if config_file.exists():
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                    self._logging_config = LoggingConfig(**config_data.get("logging", {}))
-            else:
-                self._logging_config = LoggingConfig()
+            self._logging_config = LoggingConfig(**self._load_raw().get("logging", {}))
         return self._logging_config
     
     def load_cache_config(self) -> CacheConfig:
         """加载缓存配置"""
         if self._cache_config is None:
-            config_file = self.config_dir / "engine_config.json"
-            if config_file.exists():
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                    self._cache_config = CacheConfig(**config_data.get("cache", {}))
-            else:
-                self._cache_config = CacheConfig()
+            self._cache_config = CacheConfig(**self._load_raw().get("cache", {}))
         return self._cache_config
     
+    def get_searxng_config(self) -> Dict[str, Any]:
+        """
+        获取SearXNG配置及搜索参数（search_config），用于构建搜索工具包
+        
+        缓存在设置管理器而不是配置模型上，避免改变pydantic模型的相等性比较
+        """
+        if self._searxng_config is None:
+            engine_config = self.load_engine_config()
+            self._searxng_config = {
+                **engine_config.searxng.model_dump(),
+                'search_config': engine_config.search.model_dump()
+            }
+        return self._searxng_config
+    
     def get_env_var(self, key: str, default: Optional[str] = None) -> Optional[str]:
         """获取环境变量"""
         return os.getenv(key, default)
     
     def get_openai_api_key(self) -> Optional[str]:
         """获取OpenAI API密钥"""
-        # 优先从环境变量获取
-        env_key = self.get_env_var("OPENAI_API_KEY")
-        if env_key:
-            return env_key
+        if self._api_key is not None:
+            return self._api_key
         
-        # 从配置文件获取
-        config_key = self.load_engine_config().model.openai_api_key
-        if config_key:
-            return config_key
-        
-        # 如果都没有，返回EMPTY
-        return "EMPTY"
+        # 优先从环境变量获取，其次从配置文件获取，如果都没有，返回EMPTY
+        self._api_key = (
+            self.get_env_var("OPENAI_API_KEY")
+            or self.load_engine_config().model.openai_api_key
+            or "EMPTY"
+        )
+        return self._api_key
     
     def get_openai_api_base(self) -> Optional[str]:
         """获取OpenAI API Base URL"""
-        # 优先从环境变量获取
-        env_base = self.get_env_var("OPENAI_API_BASE")
-        if env_base:
-            return env_base
-        
-        # 从配置文件获取
-        config_base = self.load_engine_config().model.openai_api_base
-        if config_base:
-            return config_base
+        if self._api_base_resolved:
+            return self._api_base
         
+        # 优先从环境变量获取，其次从配置文件获取
         # 如果没有配置，返回None（使用默认的OpenAI API）
-        return None
+        self._api_base = (
+            self.get_env_var("OPENAI_API_BASE")
+            or self.load_engine_config().model.openai_api_base
+            or None
+        )
+        self._api_base_resolved = True
+        return self._api_base
     
     def get_searxng_url(self) -> str:
         """获取SearXNG服务地址"""
@@ -177,3 +198,8 @@ class Settings:
         self._engine_config = None
         self._logging_config = None
         self._cache_config = None
+        self._searxng_config = None
+        self._raw_config = None
+        self._api_key = None
+        self._api_base = None
+        self._api_base_resolved = False
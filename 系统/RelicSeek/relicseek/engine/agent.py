@@ -1,9 +1,13 @@
 """
 RelicSeek智能体实现
 """
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, List, Any, Optional
+import re
+import time
+from typing import Dict, List, Any, Optional, Tuple
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.memory import ConversationBufferWindowMemory
 from langchain_openai import ChatOpenAI
@@ -11,8 +15,19 @@ from langchain.prompts import PromptTemplate
 from langchain.schema import BaseMessage, HumanMessage, SystemMessage
 
 from ..config.settings import Settings, EngineConfig
-from ..config.prompt_manager import PromptManager
+from ..config.prompt_manager import get_prompt_manager
+from ..config.serialization import json_dumps
 from .tools import RelicSearchToolkit
+from .cache import TTLCache
+
+
+# LLM响应中"字段：值"的匹配模式，字段名即为解析结果的键；
+# 值截止到行尾或同一行中的下一个字段名
+_KV_KEYS = r'复杂度|关键实体|查询类型|主要关键词|综合评分|置信度'
+_KV_RE = re.compile(rf'({_KV_KEYS})：(.*?)(?=(?:{_KV_KEYS})：|$)', re.M)
+
+# 每次搜索都会变化的上下文字段，不参与结果缓存的键
+_VOLATILE_CONTEXT_KEYS = frozenset({'search_id', 'timestamp'})
 
 
 class RelicSeekAgent:
@@ -27,16 +42,25 @@ class RelicSeekAgent:
         """
         self.settings = settings
         self.engine_config = settings.load_engine_config()
-        self.prompt_manager = PromptManager()
+        self.prompt_manager = get_prompt_manager()
         
         # 设置日志
         self.logger = logging.getLogger(__name__)
         
+        # 完整查询结果缓存
+        cache_config = settings.load_cache_config()
+        self._result_cache: Optional[TTLCache] = None
+        if cache_config.enabled:
+            self._result_cache = TTLCache(max_size=cache_config.max_size, ttl=cache_config.ttl)
+        
         # 初始化组件
         self._setup_llm()
         self._setup_memory()
         self._setup_tools()
         self._setup_agent()
+        
+        # 在后台预读其余prompt模板，避免首次搜索时逐个读取文件
+        self.prompt_manager.prewarm()
     
     def _setup_llm(self):
         """设置大语言模型"""
@@ -72,27 +96,32 @@ class RelicSeekAgent:
     
     def _setup_memory(self):
         """设置记忆管理"""
+        self.memory = self.create_memory()
+    
+    def create_memory(self) -> ConversationBufferWindowMemory:
+        """
+        按配置新建一份对话记忆
+        
+        多个会话共用同一个智能体时，每个会话持有自己的对话记忆并在搜索时传入，
+        对话历史互不可见
+        """
         agent_config = self.engine_config.agent
         
         if agent_config.memory_type == "buffer_window":
-            self.memory = ConversationBufferWindowMemory(
+            return ConversationBufferWindowMemory(
                 k=agent_config.memory_window_size,
                 return_messages=True,
                 memory_key="chat_history"
             )
-        else:
-            self.memory = ConversationBufferWindowMemory(
-                k=10,
-                return_messages=True,
-                memory_key="chat_history"
-            )
+        return ConversationBufferWindowMemory(
+            k=10,
+            return_messages=True,
+            memory_key="chat_history"
+        )
     
     def _setup_tools(self):
         """设置工具"""
-        searxng_config = self.engine_config.searxng.dict()
-        # 添加搜索配置参数
-        searxng_config['search_config'] = self.engine_config.search.dict()
-        self.search_toolkit = RelicSearchToolkit(searxng_config)
+        self.search_toolkit = RelicSearchToolkit(self.settings.get_searxng_config())
         self.tools = self.search_toolkit.get_langchain_tools()
     
     def _setup_agent(self):
@@ -136,11 +165,15 @@ Question: {{input}}
         )
         
         # 创建智能体执行器
+        self.agent_executor = self._build_executor(self.memory)
+    
+    def _build_executor(self, memory: ConversationBufferWindowMemory) -> AgentExecutor:
+        """创建使用指定对话记忆的智能体执行器，LLM、工具和prompt在各执行器间共用"""
         agent_config = self.engine_config.agent
-        self.agent_executor = AgentExecutor(
+        return AgentExecutor(
             agent=self.agent,
             tools=self.tools,
-            memory=self.memory,
+            memory=memory,
             max_iterations=agent_config.max_iterations,
             max_execution_time=agent_config.max_execution_time,
             early_stopping_method=agent_config.early_stopping_method,
@@ -148,63 +181,88 @@ Question: {{input}}
             handle_parsing_errors=True
         )
     
-    def search(self, query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def search(self, query: str, context: Optional[Dict[str, Any]] = None,
+               memory: Optional[ConversationBufferWindowMemory] = None) -> Dict[str, Any]:
+        """
+        执行文物搜索（同步入口，内部运行asearch）
+        
+        Args:
+            query: 用户查询
+            context: 搜索上下文
+            memory: 会话自己的对话记忆，为空时使用智能体自带的记忆
+            
+        Returns:
+            搜索结果
+        """
+        return asyncio.run(self.asearch(query, context, memory))
+    
+    async def asearch(self, query: str, context: Optional[Dict[str, Any]] = None,
+                      memory: Optional[ConversationBufferWindowMemory] = None) -> Dict[str, Any]:
         """
-        执行文物搜索
+        异步执行文物搜索
         
         Args:
             query: 用户查询
             context: 搜索上下文
+            memory: 会话自己的对话记忆，为空时使用智能体自带的记忆
             
         Returns:
             搜索结果
         """
+        cache_key = None
+        if self._result_cache is not None:
+            cache_key = self._result_cache_key(query, context)
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                self.logger.info("🤖 ♻️ 命中查询结果缓存: %s", query)
+                return self._replay_cached(cached, query, memory)
+        
         try:
             # 打印智能体搜索调试信息
             self.logger.info("🤖" + "=" * 58)
             self.logger.info("🤖 RelicSeek智能体开始处理查询")
-            self.logger.info(f"🤖 📝 用户查询: {query}")
+            self.logger.info("🤖 📝 用户查询: %s", query)
             if context:
-                self.logger.info(f"🤖 🔍 搜索上下文: {context}")
+                self.logger.info("🤖 🔍 搜索上下文: %s", context)
             self.logger.info("🤖" + "=" * 58)
             
             # 分析查询
             self.logger.info("🤖 🔍 步骤1: 分析用户查询")
-            analysis_result = self._analyze_query(query)
-            self.logger.info(f"🤖 ✅ 查询分析完成")
+            analysis_result = await self._analyze_query(query)
+            self.logger.info("🤖 ✅ 查询分析完成")
             if 'analysis_text' in analysis_result:
-                self.logger.info(f"🤖 📋 分析结果: {analysis_result['analysis_text'][:200]}...")
+                self.logger.info("🤖 📋 分析结果: %.200s...", analysis_result['analysis_text'])
             
             # 制定搜索策略
             self.logger.info("🤖 🎯 步骤2: 制定搜索策略")
-            strategy = self._plan_search_strategy(analysis_result)
-            self.logger.info(f"🤖 ✅ 搜索策略制定完成")
+            strategy = await self._plan_search_strategy(analysis_result)
+            self.logger.info("🤖 ✅ 搜索策略制定完成")
             if 'strategy_text' in strategy:
-                self.logger.info(f"🤖 📋 策略内容: {strategy['strategy_text'][:200]}...")
+                self.logger.info("🤖 📋 策略内容: %.200s...", strategy['strategy_text'])
             if 'keywords' in strategy:
-                self.logger.info(f"🤖 🔑 关键词: {strategy['keywords']}")
+                self.logger.info("🤖 🔑 关键词: %s", strategy['keywords'])
             
             # 执行搜索
             self.logger.info("🤖 🔍 步骤3: 执行搜索")
-            search_results = self._execute_search(query, strategy)
-            self.logger.info(f"🤖 ✅ 搜索执行完成")
+            search_results = await self._execute_search(query, strategy, memory)
+            self.logger.info("🤖 ✅ 搜索执行完成")
             if 'agent_output' in search_results:
-                self.logger.info(f"🤖 📋 智能体输出: {search_results['agent_output'][:200]}...")
+                self.logger.info("🤖 📋 智能体输出: %.200s...", search_results['agent_output'])
             
             # 验证和反思
             self.logger.info("🤖 🔍 步骤4: 验证和反思搜索结果")
-            validated_results = self._validate_and_reflect(search_results, query)
-            self.logger.info(f"🤖 ✅ 验证和反思完成")
+            validated_results = await self._validate_and_reflect(search_results, query)
+            self.logger.info("🤖 ✅ 验证和反思完成")
             if 'quality_score' in validated_results:
-                self.logger.info(f"🤖 ⭐ 质量评分: {validated_results['quality_score']}")
+                self.logger.info("🤖 ⭐ 质量评分: %s", validated_results['quality_score'])
             if 'confidence' in validated_results:
-                self.logger.info(f"🤖 🎯 置信度: {validated_results['confidence']}")
+                self.logger.info("🤖 🎯 置信度: %s", validated_results['confidence'])
             
             # 生成最终报告
             self.logger.info("🤖 📝 步骤5: 生成最终报告")
-            final_report = self._generate_final_report(validated_results, query)
-            self.logger.info(f"🤖 ✅ 最终报告生成完成")
-            self.logger.info(f"🤖 📋 报告长度: {len(final_report)} 字符")
+            final_report, report_ok = await self._generate_final_report(validated_results, query)
+            self.logger.info("🤖 ✅ 最终报告生成完成")
+            self.logger.info("🤖 📋 报告长度: %d 字符", len(final_report))
             
             result = {
                 'success': True,
@@ -222,66 +280,102 @@ Question: {{input}}
             self.logger.info("🤖 🎉 智能体搜索处理完成")
             self.logger.info("🤖" + "=" * 58)
             
+            # 只缓存各步骤都成功的结果，避免一次LLM或搜索服务故障在整个有效期内被重复返回；
+            # 调用方会在返回的字典上追加字段，缓存其副本
+            if cache_key is not None and report_ok and self._steps_succeeded(
+                    analysis_result, strategy, search_results, validated_results):
+                self._result_cache.set(cache_key, dict(result))
+            
             return result
             
         except Exception as e:
-            self.logger.error(f"🤖 ❌ 搜索过程中出现错误: {str(e)}")
+            self.logger.error("🤖 ❌ 搜索过程中出现错误: %s", e)
             return {
                 'success': False,
                 'error': str(e),
                 'query': query
             }
+        finally:
+            # 异步HTTP会话绑定在本次搜索的事件循环上，搜索结束时关闭
+            await self.search_toolkit.aclose()
+    
+    @staticmethod
+    def _steps_succeeded(analysis_result: Dict[str, Any], strategy: Dict[str, Any],
+                         search_results: Dict[str, Any], validated_results: Dict[str, Any]) -> bool:
+        """判断各步骤是否都成功（失败的步骤返回带error的字典，验证失败时没有反思结果）"""
+        if any('error' in step for step in (analysis_result, strategy, search_results)):
+            return False
+        return 'reflection' in validated_results
+    
+    def _replay_cached(self, cached: Dict[str, Any], query: str,
+                       memory: Optional[ConversationBufferWindowMemory]) -> Dict[str, Any]:
+        """
+        返回缓存结果的副本并刷新时间戳
+        
+        命中缓存时不运行智能体执行器，把这轮对话补记到对话记忆中，与实际执行搜索时一致
+        """
+        result = dict(cached)
+        result['metadata'] = {**cached.get('metadata', {}), 'timestamp': self._get_current_timestamp()}
+        
+        search_results = cached['results'].get('validated_results', {})
+        (memory if memory is not None else self.memory).save_context(
+            {'input': self._executor_input(query, cached.get('strategy', {}))},
+            {'output': search_results.get('agent_output', '')}
+        )
+        return result
     
-    def _analyze_query(self, query: str) -> Dict[str, Any]:
+    async def _analyze_query(self, query: str) -> Dict[str, Any]:
         """分析用户查询"""
         try:
             prompt = self.prompt_manager.get_prompt("query_analysis", user_query=query)
             
-            response = self.llm.invoke([
+            response = await self.llm.ainvoke([
                 SystemMessage(content=self.prompt_manager.get_system_prompt("search_expert")),
                 HumanMessage(content=prompt)
             ])
             
             # 简单解析响应（实际应用中可能需要更复杂的解析）
+            fields = self._parse_response(response.content)
             return {
                 'analysis_text': response.content,
-                'complexity': self._extract_complexity(response.content),
-                'entities': self._extract_entities(response.content),
-                'query_type': self._extract_query_type(response.content)
+                'complexity': self._extract_complexity(fields),
+                'entities': self._extract_entities(fields),
+                'query_type': self._extract_query_type(fields)
             }
         except Exception as e:
             self.logger.error(f"查询分析失败: {str(e)}")
             return {'error': str(e)}
     
-    def _plan_search_strategy(self, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+    async def _plan_search_strategy(self, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
         """制定搜索策略"""
         try:
             prompt = self.prompt_manager.get_prompt(
                 "strategy_planning", 
-                analysis_result=json.dumps(analysis_result, ensure_ascii=False)
+                analysis_result=json_dumps(analysis_result)
             )
             
-            response = self.llm.invoke([
+            response = await self.llm.ainvoke([
                 SystemMessage(content=self.prompt_manager.get_system_prompt("search_expert")),
                 HumanMessage(content=prompt)
             ])
             
+            fields = self._parse_response(response.content)
             return {
                 'strategy_text': response.content,
-                'keywords': self._extract_keywords(response.content),
+                'keywords': self._extract_keywords(fields),
                 'search_steps': self._extract_search_steps(response.content)
             }
         except Exception as e:
             self.logger.error(f"策略制定失败: {str(e)}")
             return {'error': str(e)}
     
-    def _execute_search(self, query: str, strategy: Dict[str, Any]) -> Dict[str, Any]:
+    async def _execute_search(self, query: str, strategy: Dict[str, Any],
+                              memory: Optional[ConversationBufferWindowMemory] = None) -> Dict[str, Any]:
         """执行搜索"""
         try:
-            # 使用智能体执行器进行搜索
-            result = self.agent_executor.invoke({
-                'input': f"请根据以下搜索策略为用户查询'{query}'寻找相关的文物信息：\n{strategy.get('strategy_text', '')}"
-            })
+            # 使用智能体执行器进行搜索，传入会话记忆时使用绑定该记忆的执行器
+            executor = self.agent_executor if memory is None else self._build_executor(memory)
+            result = await executor.ainvoke({'input': self._executor_input(query, strategy)})
             
             return {
                 'agent_output': result.get('output', ''),
@@ -292,23 +386,31 @@ Question: {{input}}
             self.logger.error(f"搜索执行失败: {str(e)}")
             return {'error': str(e)}
     
-    def _validate_and_reflect(self, search_results: Dict[str, Any], 
-                             original_query: str) -> Dict[str, Any]:
+    @staticmethod
+    def _executor_input(query: str, strategy: Dict[str, Any]) -> str:
+        """构建智能体执行器的输入"""
+        return f"请根据以下搜索策略为用户查询'{query}'寻找相关的文物信息：\n{strategy.get('strategy_text', '')}"
+    
+    async def _validate_and_reflect(self, search_results: Dict[str, Any], 
+                                   original_query: str) -> Dict[str, Any]:
         """验证和反思搜索结果"""
         try:
+            # 搜索结果在反思和质量评估中都会用到，只序列化一次
+            search_results_json = json_dumps(search_results)
             prompt = self.prompt_manager.get_prompt(
                 "reflection",
-                current_results=json.dumps(search_results, ensure_ascii=False),
+                current_results=search_results_json,
                 original_query=original_query
             )
             
-            response = self.llm.invoke([
-                SystemMessage(content=self.prompt_manager.get_system_prompt("search_expert")),
-                HumanMessage(content=prompt)
-            ])
-            
-            # 获取质量评估
-            quality_assessment = self._assess_quality(search_results)
+            # 反思与质量评估互不依赖，并发执行
+            response, quality_assessment = await asyncio.gather(
+                self.llm.ainvoke([
+                    SystemMessage(content=self.prompt_manager.get_system_prompt("search_expert")),
+                    HumanMessage(content=prompt)
+                ]),
+                self._assess_quality(search_results, search_results_json)
+            )
             
             return {
                 'validated_results': search_results,
@@ -321,131 +423,149 @@ Question: {{input}}
             self.logger.error(f"验证和反思失败: {str(e)}")
             return search_results
     
-    def _assess_quality(self, results: Dict[str, Any]) -> Dict[str, Any]:
+    async def _assess_quality(self, results: Dict[str, Any],
+                              results_json: Optional[str] = None) -> Dict[str, Any]:
         """评估结果质量"""
         try:
+            if results_json is None:
+                results_json = json_dumps(results)
+            
             prompt = self.prompt_manager.get_prompt(
                 "quality_assessment",
-                artifact_info=json.dumps(results, ensure_ascii=False),
+                artifact_info=results_json,
                 source_info="搜索结果集"
             )
             
-            response = self.llm.invoke([
+            response = await self.llm.ainvoke([
                 SystemMessage(content=self.prompt_manager.get_system_prompt("search_expert")),
                 HumanMessage(content=prompt)
             ])
             
+            fields = self._parse_response(response.content)
             return {
-                'score': self._extract_quality_score(response.content),
-                'confidence': self._extract_confidence(response.content),
+                'score': self._extract_quality_score(fields),
+                'confidence': self._extract_confidence(fields),
                 'assessment_text': response.content
             }
         except Exception as e:
             self.logger.error(f"质量评估失败: {str(e)}")
             return {'score': 0, 'confidence': 'low'}
     
-    def _generate_final_report(self, validated_results: Dict[str, Any], 
-                              query: str) -> str:
-        """生成最终报告"""
+    async def _generate_final_report(self, validated_results: Dict[str, Any], 
+                                    query: str) -> Tuple[str, bool]:
+        """
+        生成最终报告
+        
+        Returns:
+            (报告文本, 是否生成成功)，失败时报告文本为错误说明
+        """
         try:
             prompt = self.prompt_manager.get_prompt(
                 "final_summary",
-                artifact_data=json.dumps(validated_results, ensure_ascii=False),
+                artifact_data=json_dumps(validated_results),
                 search_context=query
             )
             
-            response = self.llm.invoke([
+            response = await self.llm.ainvoke([
                 SystemMessage(content=self.prompt_manager.get_system_prompt("search_expert")),
                 HumanMessage(content=prompt)
             ])
             
-            return response.content
+            return response.content, True
         except Exception as e:
             self.logger.error(f"报告生成失败: {str(e)}")
-            return f"报告生成失败: {str(e)}"
+            return f"报告生成失败: {str(e)}", False
     
     # 辅助方法用于从LLM响应中提取结构化信息
-    def _extract_complexity(self, text: str) -> str:
-        """从分析文本中提取复杂度"""
-        if "复杂度：" in text:
-            line = [l for l in text.split('\n') if "复杂度：" in l][0]
-            return line.split("复杂度：")[1].strip()
-        return "中等"
-    
-    def _extract_entities(self, text: str) -> List[str]:
-        """从分析文本中提取实体"""
-        entities = []
-        if "关键实体：" in text:
-            line = [l for l in text.split('\n') if "关键实体：" in l][0]
-            entities_text = line.split("关键实体：")[1].strip()
-            entities = [e.strip() for e in entities_text.split(',') if e.strip()]
-        return entities
-    
-    def _extract_query_type(self, text: str) -> str:
-        """从分析文本中提取查询类型"""
-        if "查询类型：" in text:
-            line = [l for l in text.split('\n') if "查询类型：" in l][0]
-            return line.split("查询类型：")[1].strip()
-        return "属性搜索"
-    
-    def _extract_keywords(self, text: str) -> List[str]:
-        """从策略文本中提取关键词"""
-        keywords = []
-        if "主要关键词：" in text:
-            line = [l for l in text.split('\n') if "主要关键词：" in l][0]
-            keywords_text = line.split("主要关键词：")[1].strip()
-            keywords = [k.strip() for k in keywords_text.split(',') if k.strip()]
-        return keywords
+    def _parse_response(self, text: str) -> Dict[str, str]:
+        """
+        单次扫描LLM响应，提取所有已知的"字段：值"
+        
+        Args:
+            text: LLM响应文本
+            
+        Returns:
+            字段名到值的映射（同名字段以首次出现为准）
+        """
+        fields: Dict[str, str] = {}
+        for match in _KV_RE.finditer(text):
+            fields.setdefault(match.group(1), match.group(2).strip())
+        return fields
+    
+    def _extract_complexity(self, fields: Dict[str, str]) -> str:
+        """从分析结果中提取复杂度"""
+        return fields.get("复杂度", "中等")
+    
+    def _extract_entities(self, fields: Dict[str, str]) -> List[str]:
+        """从分析结果中提取实体"""
+        entities_text = fields.get("关键实体", "")
+        return [e.strip() for e in entities_text.split(',') if e.strip()]
+    
+    def _extract_query_type(self, fields: Dict[str, str]) -> str:
+        """从分析结果中提取查询类型"""
+        return fields.get("查询类型", "属性搜索")
+    
+    def _extract_keywords(self, fields: Dict[str, str]) -> List[str]:
+        """从策略结果中提取关键词"""
+        keywords_text = fields.get("主要关键词", "")
+        return [k.strip() for k in keywords_text.split(',') if k.strip()]
     
     def _extract_search_steps(self, text: str) -> List[str]:
         """从策略文本中提取搜索步骤"""
         steps = []
-        lines = text.split('\n')
-        for line in lines:
-            if line.strip().startswith('步骤'):
-                steps.append(line.strip())
+        for raw in text.split('\n'):
+            line = raw.strip()
+            if line.startswith('步骤'):
+                steps.append(line)
         return steps
     
-    def _extract_quality_score(self, text: str) -> float:
-        """从质量评估文本中提取评分"""
-        if "综合评分：" in text:
-            line = [l for l in text.split('\n') if "综合评分：" in l][0]
-            score_text = line.split("综合评分：")[1].strip()
+    def _extract_quality_score(self, fields: Dict[str, str]) -> float:
+        """从质量评估结果中提取评分"""
+        score_text = fields.get("综合评分")
+        if score_text:
             try:
                 return float(score_text.split('/')[0])
             except:
                 pass
         return 3.0
     
-    def _extract_confidence(self, text: str) -> str:
-        """从质量评估文本中提取置信度"""
-        if "置信度：" in text:
-            line = [l for l in text.split('\n') if "置信度：" in l][0]
-            return line.split("置信度：")[1].strip()
-        return "中"
+    def _extract_confidence(self, fields: Dict[str, str]) -> str:
+        """从质量评估结果中提取置信度"""
+        return fields.get("置信度", "中")
     
     def _extract_recommendations(self, text: str) -> List[str]:
         """从反思文本中提取建议"""
         recommendations = []
-        if "改进建议：" in text:
-            lines = text.split('\n')
-            start_idx = -1
-            for i, line in enumerate(lines):
-                if "改进建议：" in line:
-                    start_idx = i
-                    break
-            
-            if start_idx >= 0:
-                for line in lines[start_idx:]:
-                    if line.strip().startswith('-') or line.strip().startswith('•'):
-                        recommendations.append(line.strip())
+        in_section = False
+        for raw in text.split('\n'):
+            if not in_section:
+                # 从"改进建议："所在行开始收集
+                in_section = "改进建议：" in raw
+                if not in_section:
+                    continue
+            line = raw.strip()
+            if line.startswith(('-', '•')):
+                recommendations.append(line)
         
         return recommendations
     
+    def _result_cache_key(self, query: str, context: Optional[Dict[str, Any]]) -> str:
+        """根据查询和稳定的上下文字段生成结果缓存键"""
+        stable_context = {
+            k: v for k, v in (context or {}).items() if k not in _VOLATILE_CONTEXT_KEYS
+        }
+        payload = json.dumps(stable_context, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(f"{query}\0{payload}".encode('utf-8'), digest_size=16).hexdigest()
+    
     def _get_current_timestamp(self) -> str:
         """获取当前时间戳"""
-        from datetime import datetime
-        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return time.strftime("%Y-%m-%d %H:%M:%S")
+    
+    def refresh_prompts(self):
+        """重新获取共享的Prompt管理器并重建智能体执行器，用于配置重新加载后复用智能体"""
+        self.prompt_manager = get_prompt_manager()
+        self._setup_agent()
+        self.prompt_manager.prewarm()
     
     def get_conversation_history(self) -> List[BaseMessage]:
         """获取对话历史"""
@@ -457,3 +577,11 @@ Question: {{input}}
         """清除记忆"""
         if hasattr(self.memory, 'clear'):
             self.memory.clear()
+        if self._result_cache is not None:
+            self._result_cache.clear()
+    
+    def close(self):
+        """释放智能体持有的资源（搜索工具的HTTP会话、结果缓存）"""
+        self.search_toolkit.close()
+        if self._result_cache is not None:
+            self._result_cache.clear()
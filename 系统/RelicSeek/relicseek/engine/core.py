@@ -1,19 +1,144 @@
 """
 RelicSeek核心引擎
 """
+import atexit
+import itertools
 import logging
+import logging.handlers
 import json
+import os
+import queue
+import secrets
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import requests
 
 from ..config.settings import Settings
+from ..config.prompt_manager import get_prompt_manager
+from ..config.serialization import json_dumps
 from .agent import RelicSeekAgent
+from .cache import TTLCache
+
+
+# validate_setup各项探测结果的缓存时间（秒）
+_SEARXNG_PROBE_TTL = 30
+_FILE_PROBE_TTL = 60
+
+# SearXNG探测在进程级的长期线程池中执行，各次验证复用其工作线程
+_PROBE_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="relic-probe")
+
+# 项目根目录，模块导入时解析一次
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# validate_setup检查的配置文件（相对配置目录）和prompt文件（相对项目根目录）
+_CONFIG_FILES = ('engine_config.json', 'prompts_config.json')
+_PROMPT_FILES = (
+    'prompts/query_analysis.txt',
+    'prompts/strategy_planning.txt',
+    'prompts/reflection.txt',
+    'prompts/system/agent_system.txt'
+)
+_PROMPT_PATHS = tuple(
+    (prompt_file, prompt_file.rsplit('/', 1)[-1], _PROJECT_ROOT / prompt_file)
+    for prompt_file in _PROMPT_FILES
+)
+# prompt文件所在的目录，每个目录只扫描一次
+_PROMPT_DIRS = tuple(dict.fromkeys(prompt_path.parent for _, _, prompt_path in _PROMPT_PATHS))
+
+# 搜索调试横幅分隔线
+_BANNER = "🚀" + "=" * 60
+
+# 按配置缓存的智能体数量上限
+_AGENT_POOL_SIZE = 4
+
+# 进程内共享的日志状态：root logger上只安装一个QueueHandler，
+# 日志配置未变化时复用，各引擎实例按引用计数释放
+_logging_lock = threading.Lock()
+_logging_state: Dict[str, Any] = {
+    'config_hash': None,
+    'queue_handler': None,
+    'listener': None,
+    'handlers': [],
+    'refs': 0
+}
+
+
+def _install_logging(logging_config) -> None:
+    """按日志配置安装处理器，配置未变化时直接复用（调用方需持有_logging_lock）"""
+    config_hash = hash(json.dumps(logging_config.model_dump(), sort_keys=True))
+    if _logging_state['config_hash'] == config_hash:
+        return
+    _teardown_logging()
+    
+    # 创建日志目录
+    log_file = Path(logging_config.file)
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    formatter = logging.Formatter(logging_config.format)
+    file_handler = logging.FileHandler(logging_config.file, encoding='utf-8')
+    file_handler.setFormatter(formatter)
+    # 文件写入先缓冲，累积512条或遇到ERROR时批量落盘
+    buffered_file_handler = logging.handlers.MemoryHandler(
+        capacity=512, flushLevel=logging.ERROR, target=file_handler
+    )
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    
+    # 调用线程只负责入队，实际I/O由后台监听线程完成
+    # 队列处理器使用默认格式只合并消息参数，完整格式由监听端的处理器负责
+    log_queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    listener = logging.handlers.QueueListener(
+        log_queue, buffered_file_handler, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    
+    root_logger = logging.getLogger()
+    root_logger.setLevel(getattr(logging, logging_config.level))
+    root_logger.addHandler(queue_handler)
+    
+    _logging_state.update(
+        config_hash=config_hash,
+        queue_handler=queue_handler,
+        listener=listener,
+        handlers=[buffered_file_handler, file_handler, stream_handler]
+    )
+
+
+def _teardown_logging() -> None:
+    """停止监听线程、移除QueueHandler并刷新、关闭处理器（调用方需持有_logging_lock）"""
+    if _logging_state['listener'] is not None:
+        _logging_state['listener'].stop()
+    if _logging_state['queue_handler'] is not None:
+        logging.getLogger().removeHandler(_logging_state['queue_handler'])
+    for handler in _logging_state['handlers']:
+        handler.close()
+    _logging_state.update(config_hash=None, queue_handler=None, listener=None, handlers=[])
+
+
+@atexit.register
+def _shutdown_logging() -> None:
+    """进程退出时先排空队列，再由logging.shutdown完成剩余清理"""
+    with _logging_lock:
+        _teardown_logging()
 
 
 class RelicSeekEngine:
     """RelicSeek核心引擎"""
     
+    __slots__ = (
+        'settings', 'logger', 'agent', '_http_session', '_validate_cache',
+        '_logging_acquired', '_agent_pool', '_agent_cfg_hash'
+    )
+    
+    # 搜索ID = 进程级随机前缀 + 自增计数，无需每次生成完整UUID
+    _id_prefix = secrets.token_hex(4)
+    _id_counter = itertools.count()
+    
     def __init__(self, config_dir: Optional[str] = None):
         """
         初始化引擎
@@ -24,47 +149,80 @@ class RelicSeekEngine:
         # 初始化设置
         self.settings = Settings(config_dir)
         
+        # 系统验证使用的HTTP会话和探测结果缓存
+        self._http_session = requests.Session()
+        self._validate_cache = TTLCache(max_size=64, ttl=_FILE_PROBE_TTL)
+        
         # 设置日志
+        self._logging_acquired = False
         self._setup_logging()
         self.logger = logging.getLogger(__name__)
         
         # 初始化组件
         self.agent: Optional[RelicSeekAgent] = None
+        # 按配置哈希缓存已构建的智能体，配置未变化时重新加载可直接复用
+        self._agent_pool: "OrderedDict[int, RelicSeekAgent]" = OrderedDict()
+        self._agent_cfg_hash: Optional[int] = None
         self._initialize_engine()
         
         self.logger.info("RelicSeek引擎初始化完成")
     
     def _setup_logging(self):
-        """设置日志系统"""
-        logging_config = self.settings.load_logging_config()
-        
-        # 创建日志目录
-        log_file = Path(logging_config.file)
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        # 配置日志
-        logging.basicConfig(
-            level=getattr(logging, logging_config.level),
-            format=logging_config.format,
-            handlers=[
-                logging.FileHandler(logging_config.file, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        """设置日志系统，日志配置未变化时复用已安装的处理器"""
+        with _logging_lock:
+            _install_logging(self.settings.load_logging_config())
+            if not self._logging_acquired:
+                _logging_state['refs'] += 1
+                self._logging_acquired = True
+    
+    def _stop_logging(self):
+        """释放本实例对日志系统的引用，最后一个引用释放时停止监听线程并关闭处理器"""
+        with _logging_lock:
+            if self._logging_acquired:
+                self._logging_acquired = False
+                _logging_state['refs'] -= 1
+                if _logging_state['refs'] == 0:
+                    _teardown_logging()
     
     def _initialize_engine(self):
         """初始化引擎组件"""
         try:
-            # 初始化智能体
-            self.agent = RelicSeekAgent(self.settings)
-            self.logger.info("智能体初始化成功")
+            config_hash = self._agent_config_hash()
+            agent = self._agent_pool.get(config_hash)
+            if agent is not None:
+                # 配置与已构建的智能体一致，复用并重置其会话状态
+                self._agent_pool.move_to_end(config_hash)
+                agent.refresh_prompts()
+                agent.clear_memory()
+                self.logger.info("智能体配置未变化，复用已有智能体")
+            else:
+                # 初始化智能体
+                agent = RelicSeekAgent(self.settings)
+                self._agent_pool[config_hash] = agent
+                while len(self._agent_pool) > _AGENT_POOL_SIZE:
+                    _, evicted = self._agent_pool.popitem(last=False)
+                    evicted.close()
+                self.logger.info("智能体初始化成功")
+            
+            self.agent = agent
+            self._agent_cfg_hash = config_hash
             
         except Exception as e:
             self.logger.error(f"引擎初始化失败: {str(e)}")
             raise
     
+    def _agent_config_hash(self) -> int:
+        """计算影响智能体构建的配置的哈希值"""
+        payload = {
+            'engine': self.settings.load_engine_config().model_dump(),
+            'cache': self.settings.load_cache_config().model_dump(),
+            'api_key': self.settings.get_openai_api_key(),
+            'api_base': self.settings.get_openai_api_base()
+        }
+        return hash(json.dumps(payload, sort_keys=True, default=str))
+    
     def search(self, query: str, user_id: Optional[str] = None, 
-               session_id: Optional[str] = None) -> Dict[str, Any]:
+               session_id: Optional[str] = None, memory: Optional[Any] = None) -> Dict[str, Any]:
         """
         执行文物搜索
         
@@ -72,6 +230,8 @@ class RelicSeekEngine:
             query: 用户查询
             user_id: 用户ID（可选）
             session_id: 会话ID（可选）
+            memory: 会话自己的对话记忆（可选，由create_session_memory创建），
+                为空时使用智能体自带的记忆
             
         Returns:
             搜索结果字典
@@ -81,16 +241,17 @@ class RelicSeekEngine:
         
         # 记录搜索开始
         search_id = self._generate_search_id()
+        now = datetime.now()
         
-        # 打印引擎搜索调试信息
-        self.logger.info("🚀" + "=" * 60)
-        self.logger.info("🚀 RelicSeek引擎开始执行搜索")
-        self.logger.info(f"🚀 🆔 搜索ID: {search_id}")
-        self.logger.info(f"🚀 📝 用户查询: {query}")
-        self.logger.info(f"🚀 👤 用户ID: {user_id or '未指定'}")
-        self.logger.info(f"🚀 💬 会话ID: {session_id or '未指定'}")
-        self.logger.info(f"🚀 ⏰ 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        self.logger.info("🚀" + "=" * 60)
+        # 打印引擎搜索调试信息（仅DEBUG级别）
+        verbose = self.logger.isEnabledFor(logging.DEBUG)
+        if verbose:
+            self.logger.debug(_BANNER)
+            self.logger.debug(
+                "🚀 RelicSeek引擎开始执行搜索 id=%s query=%s uid=%s sid=%s start=%s",
+                search_id, query, user_id or '未指定', session_id or '未指定',
+                now.strftime('%Y-%m-%d %H:%M:%S')
+            )
         
         try:
             # 构建搜索上下文
@@ -98,44 +259,39 @@ class RelicSeekEngine:
                 'search_id': search_id,
                 'user_id': user_id,
                 'session_id': session_id,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': now.isoformat()
             }
             
-            self.logger.info(f"🚀 🔍 构建搜索上下文完成")
-            
             # 执行搜索
-            self.logger.info(f"🚀 🤖 调用智能体执行搜索")
-            result = self.agent.search(query, context)
+            result = self.agent.search(query, context, memory)
             
             # 添加元数据
             result['search_id'] = search_id
             result['context'] = context
             
-            # 记录搜索完成
-            if result.get('success', False):
-                self.logger.info(f"🚀 ✅ 搜索完成 [ID: {search_id}]: 成功")
-                self.logger.info(f"🚀 📊 搜索结果包含:")
-                if 'analysis' in result:
-                    self.logger.info(f"🚀   - 查询分析: ✅")
-                if 'strategy' in result:
-                    self.logger.info(f"🚀   - 搜索策略: ✅")
-                if 'results' in result:
-                    self.logger.info(f"🚀   - 搜索结果: ✅")
-                if 'report' in result:
-                    self.logger.info(f"🚀   - 最终报告: ✅")
-                if 'metadata' in result:
-                    iterations = result['metadata'].get('iterations', 0)
-                    self.logger.info(f"🚀   - 执行迭代次数: {iterations}")
+            # 记录搜索完成：每次搜索只输出一条JSON日志
+            success = result.get('success', False)
+            record = self._search_log_record(search_id, query, user_id, session_id, now, success)
+            if success:
+                # 结果组成：analysis=查询分析 strategy=搜索策略 results=搜索结果 report=最终报告
+                record['parts'] = [
+                    key for key in ('analysis', 'strategy', 'results', 'report') if key in result
+                ]
+                record['iters'] = result.get('metadata', {}).get('iterations', 0)
+                self._log_search_record(logging.INFO, record)
             else:
-                self.logger.warning(f"🚀 ❌ 搜索完成 [ID: {search_id}]: 失败 - {result.get('error', '未知错误')}")
+                record['error'] = result.get('error', '未知错误')
+                self._log_search_record(logging.WARNING, record)
             
-            self.logger.info("🚀" + "=" * 60)
+            if verbose:
+                self.logger.debug(_BANNER)
             
             return result
             
         except Exception as e:
-            self.logger.error(f"🚀 ❌ 搜索执行错误 [ID: {search_id}]: {str(e)}")
-            self.logger.info("🚀" + "=" * 60)
+            record = self._search_log_record(search_id, query, user_id, session_id, now, False)
+            record['error'] = str(e)
+            self._log_search_record(logging.ERROR, record)
             return {
                 'success': False,
                 'error': str(e),
@@ -143,6 +299,29 @@ class RelicSeekEngine:
                 'query': query
             }
     
+    @staticmethod
+    def _search_log_record(search_id: str, query: str, user_id: Optional[str],
+                           session_id: Optional[str], start: datetime,
+                           success: bool) -> Dict[str, Any]:
+        """构建单次搜索的结构化日志记录"""
+        end = datetime.now()
+        return {
+            'event': 'search',
+            'id': search_id,
+            'query': query,
+            'user': user_id,
+            'session': session_id,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'duration': round((end - start).total_seconds(), 3),
+            'success': success
+        }
+    
+    def _log_search_record(self, level: int, record: Dict[str, Any]) -> None:
+        """以一条JSON日志输出搜索记录，级别未启用时跳过序列化"""
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, "%s", json_dumps(record))
+    
     def get_search_history(self, user_id: Optional[str] = None, 
                           session_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -159,16 +338,49 @@ class RelicSeekEngine:
         # 当前版本从内存中获取对话历史
         if self.agent:
             history = self.agent.get_conversation_history()
-            return [{'message': msg.content, 'type': type(msg).__name__} for msg in history]
+            return [{'message': msg.content, 'type': msg.__class__.__name__} for msg in history]
         return []
     
-    def clear_session(self, session_id: Optional[str] = None):
+    def iter_search_history(self, user_id: Optional[str] = None,
+                            session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        逐条获取搜索历史，只需遍历时无需构建完整列表
+        
+        Args:
+            user_id: 用户ID
+            session_id: 会话ID
+            
+        Yields:
+            搜索历史记录
+        """
+        if self.agent:
+            for msg in self.agent.get_conversation_history():
+                yield {'message': msg.content, 'type': msg.__class__.__name__}
+    
+    def create_session_memory(self) -> Any:
+        """
+        为一个会话新建独立的对话记忆
+        
+        多个会话共用同一个引擎时（如Web界面），各会话保存自己的记忆并在搜索时传入，
+        对话历史不会进入其他会话的prompt
+        """
+        if not self.agent:
+            raise RuntimeError("引擎未正确初始化")
+        return self.agent.create_memory()
+    
+    def clear_session(self, session_id: Optional[str] = None, memory: Optional[Any] = None):
         """
         清除会话状态
         
         Args:
             session_id: 会话ID
+            memory: 会话自己的对话记忆，提供时只清除这份记忆，不影响其他会话
         """
+        if memory is not None:
+            memory.clear()
+            self.logger.info(f"会话状态已清除 [Session: {session_id}]")
+            return
+        
         if self.agent:
             self.agent.clear_memory()
             self.logger.info(f"会话状态已清除 [Session: {session_id}]")
@@ -183,11 +395,9 @@ class RelicSeekEngine:
         status = {
             'initialized': self.agent is not None,
             'timestamp': datetime.now().isoformat(),
-            'config': {
-                'model': self.settings.load_engine_config().model.dict(),
-                'agent': self.settings.load_engine_config().agent.dict(),
-                'search': self.settings.load_engine_config().search.dict()
-            }
+            # 每次生成新的配置快照，调用方修改返回的状态不会影响后续结果；
+            # 界面层已按刷新周期缓存整个状态
+            'config': self.settings.load_engine_config().status_snapshot()
         }
         
         if self.agent:
@@ -203,6 +413,11 @@ class RelicSeekEngine:
         """重新加载配置"""
         try:
             self.settings.reload_configs()
+            # 日志配置变化时重建处理器，未变化时保持不动
+            self._setup_logging()
+            self._validate_cache.clear()
+            # 丢弃共享的Prompt管理器，使新智能体重新读取prompt配置和模板
+            get_prompt_manager.cache_clear()
             self._initialize_engine()
             self.logger.info("配置重新加载成功")
         except Exception as e:
@@ -242,44 +457,38 @@ class RelicSeekEngine:
                 'message': 'API密钥未配置 (需要设置OPENAI_API_KEY或配置自定义API Base)'
             }
         
-        # 检查SearXNG连接
+        # 只有SearXNG网络探测较慢，放到后台线程，与下面的文件检查同时进行
         searxng_url = self.settings.get_searxng_url()
-        try:
-            import requests
-            response = requests.get(f"{searxng_url}/search", timeout=5)
-            searxng_status = 'success' if response.status_code == 200 else 'warning'
-            searxng_message = 'SearXNG服务连接正常' if searxng_status == 'success' else 'SearXNG服务连接异常'
-        except Exception as e:
-            searxng_status = 'error'
-            searxng_message = f'SearXNG服务不可用: {str(e)}'
+        searxng_future = _PROBE_EXECUTOR.submit(
+            self._validate_cache.get_or_set,
+            f"searxng:{searxng_url}",
+            lambda: self._probe_searxng(searxng_url),
+            _SEARXNG_PROBE_TTL
+        )
         
-        validation_results['checks']['searxng_connection'] = {
-            'status': searxng_status,
-            'message': searxng_message
+        # 文件检查按目录批量进行：每个目录一次scandir（结果有缓存），再做集合成员判断
+        dir_files = {
+            directory: self._dir_files(directory)
+            for directory in (self.settings.config_dir, *_PROMPT_DIRS)
         }
         
+        # 按固定顺序汇总结果，保持检查项顺序稳定
+        # 检查SearXNG连接
+        validation_results['checks']['searxng_connection'] = searxng_future.result()
+        
         # 检查配置文件
-        config_files = ['engine_config.json', 'prompts_config.json']
-        for config_file in config_files:
-            config_path = self.settings.config_dir / config_file
-            file_exists = config_path.exists()
+        config_dir_files = dir_files[self.settings.config_dir]
+        for config_file in _CONFIG_FILES:
+            file_exists = config_file in config_dir_files
             validation_results['checks'][f'config_{config_file}'] = {
                 'status': 'success' if file_exists else 'error',
                 'message': f'配置文件{config_file}存在' if file_exists else f'配置文件{config_file}不存在'
             }
         
         # 检查prompt文件
-        prompt_files = [
-            'prompts/query_analysis.txt',
-            'prompts/strategy_planning.txt',
-            'prompts/reflection.txt',
-            'prompts/system/agent_system.txt'
-        ]
-        project_root = Path(__file__).parent.parent.parent
-        for prompt_file in prompt_files:
-            prompt_path = project_root / prompt_file
-            file_exists = prompt_path.exists()
-            validation_results['checks'][f'prompt_{prompt_file.split("/")[-1]}'] = {
+        for prompt_file, prompt_name, prompt_path in _PROMPT_PATHS:
+            file_exists = prompt_path.name in dir_files[prompt_path.parent]
+            validation_results['checks'][f'prompt_{prompt_name}'] = {
                 'status': 'success' if file_exists else 'error',
                 'message': f'Prompt文件{prompt_file}存在' if file_exists else f'Prompt文件{prompt_file}不存在'
             }
@@ -299,10 +508,40 @@ class RelicSeekEngine:
         
         return validation_results
     
+    def _probe_searxng(self, searxng_url: str) -> Dict[str, str]:
+        """探测SearXNG服务是否可用"""
+        try:
+            # 只需确认服务可达，HEAD请求根路径即可，无需下载搜索页面
+            response = self._http_session.head(searxng_url, timeout=2, allow_redirects=False)
+            searxng_status = 'success' if response.ok else 'warning'
+            searxng_message = 'SearXNG服务连接正常' if searxng_status == 'success' else 'SearXNG服务连接异常'
+        except Exception as e:
+            searxng_status = 'error'
+            searxng_message = f'SearXNG服务不可用: {str(e)}'
+        
+        return {
+            'status': searxng_status,
+            'message': searxng_message
+        }
+    
+    def _dir_files(self, directory: Path) -> frozenset:
+        """列出目录下的文件名（结果短时缓存）"""
+        return self._validate_cache.get_or_set(
+            f"dir:{directory}", lambda: self._scan_files(directory), ttl=_FILE_PROBE_TTL
+        )
+    
+    @staticmethod
+    def _scan_files(directory: Path) -> frozenset:
+        """用一次scandir列出目录下的文件名，目录不存在时返回空集合"""
+        try:
+            with os.scandir(directory) as entries:
+                return frozenset(entry.name for entry in entries if entry.is_file())
+        except OSError:
+            return frozenset()
+    
     def _generate_search_id(self) -> str:
         """生成搜索ID"""
-        import uuid
-        return str(uuid.uuid4())[:8]
+        return f"{self._id_prefix}{next(self._id_counter):04x}"
     
     def __enter__(self):
         """上下文管理器入口"""
@@ -310,5 +549,16 @@ class RelicSeekEngine:
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """上下文管理器出口"""
-        # 执行清理操作
-        pass
+        self.close()
+    
+    def close(self):
+        """释放引擎持有的资源：智能体、HTTP会话、缓存和日志引用（可重复调用）"""
+        for agent in self._agent_pool.values():
+            agent.close()
+        self._agent_pool.clear()
+        self.agent = None
+        self._agent_cfg_hash = None
+        self._http_session.close()
+        self._validate_cache.clear()
+        # 最后释放日志，确保之前的日志记录都被写出
+        self._stop_logging()
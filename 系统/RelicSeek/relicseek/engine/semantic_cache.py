@@ -0,0 +1,186 @@
+"""
+语义查询缓存
+
+按查询语义复用已有的搜索结果：安装了sentence-transformers时比较查询句向量的
+余弦相似度，否则退化为规范化查询文本的精确匹配
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # pragma: no cover - sentence-transformers为可选依赖
+    np = None
+    SentenceTransformer = None
+
+
+# 默认使用的小型多语言句向量模型
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# 模型加载失败后重试前的等待时间（秒）
+_LOAD_RETRY_INTERVAL = 300
+
+logger = logging.getLogger(__name__)
+
+# 已加载的模型，以及最近一次加载失败的时间
+_models: Dict[str, Any] = {}
+_load_failures: Dict[str, float] = {}
+_models_lock = threading.Lock()
+
+
+def load_embedding_model(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    """
+    加载句向量模型（加载成功后进程内复用）
+    
+    加载失败（如离线或下载超时）不会被永久记住，间隔_LOAD_RETRY_INTERVAL秒后再次调用时重试
+    
+    Returns:
+        模型对象；未安装依赖、模型无法加载或仍在重试等待期内时返回None
+    """
+    if SentenceTransformer is None:
+        return None
+    
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is not None:
+            return model
+        
+        failed_at = _load_failures.get(model_name)
+        if failed_at is not None and time.monotonic() - failed_at < _LOAD_RETRY_INTERVAL:
+            return None
+        
+        try:
+            model = SentenceTransformer(model_name)
+        except Exception:
+            logger.warning("句向量模型加载失败，暂时只做精确匹配: %s", model_name, exc_info=True)
+            _load_failures[model_name] = time.monotonic()
+            return None
+        
+        _load_failures.pop(model_name, None)
+        _models[model_name] = model
+        return model
+
+
+def _normalize_query(query: str) -> str:
+    """规范化查询文本：合并空白并转为小写"""
+    return ' '.join(query.split()).lower()
+
+
+class SemanticCache:
+    """按语义相似度命中的LRU搜索结果缓存，条目写入ttl秒后过期"""
+    
+    def __init__(self, threshold: float = 0.92, ttl: float = 3600, max_size: int = 200,
+                 model: Optional[Any] = None):
+        """
+        初始化缓存
+        
+        Args:
+            threshold: 判定为同义查询的最低余弦相似度
+            ttl: 条目有效期（秒）
+            max_size: 最大条目数，超出时淘汰最久未使用的条目
+            model: 句向量模型（需提供encode方法），为空时只做精确匹配
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self.model = model if np is not None else None
+        # 规范化查询 -> (过期时间, 句向量, 搜索结果)
+        self._data: "OrderedDict[str, Tuple[float, Any, Dict[str, Any]]]" = OrderedDict()
+        # 句向量矩阵及其行对应的查询，条目变化后在下次查找时重建
+        self._keys: List[str] = []
+        self._matrix = None
+        self._dirty = False
+        # 最近一次查找计算的句向量，写入同一查询时复用
+        self._last_embedding: Optional[Tuple[str, Any]] = None
+        self._lock = threading.Lock()
+    
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """查找与query同义的缓存结果，未命中时返回None"""
+        key = _normalize_query(query)
+        now = time.monotonic()
+        
+        with self._lock:
+            self._purge_expired(now)
+            
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+                return item[2]
+            
+            if self.model is None or not self._data:
+                return None
+        
+        # 编码查询不持有锁，耗时的模型推理不阻塞其他会话
+        embedding = self._encode(key)
+        
+        with self._lock:
+            self._last_embedding = (key, embedding)
+            if self._dirty:
+                self._rebuild_matrix()
+            if self._matrix is None:
+                return None
+            
+            # 句向量已归一化，一次矩阵乘法即得到与所有缓存查询的余弦相似度
+            similarities = self._matrix @ embedding
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold:
+                return None
+            
+            best_key = self._keys[best]
+            item = self._data.get(best_key)
+            if item is None or item[0] < now:
+                return None
+            self._data.move_to_end(best_key)
+            return item[2]
+    
+    def set(self, query: str, result: Dict[str, Any]) -> None:
+        """缓存query的搜索结果"""
+        key = _normalize_query(query)
+        embedding = None
+        if self.model is not None:
+            last = self._last_embedding
+            embedding = last[1] if last is not None and last[0] == key else self._encode(key)
+        
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, embedding, result)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+            self._dirty = True
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+            self._keys = []
+            self._matrix = None
+            self._dirty = False
+            self._last_embedding = None
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def _encode(self, text: str):
+        """计算归一化的句向量"""
+        return self.model.encode(text, normalize_embeddings=True)
+    
+    def _purge_expired(self, now: float) -> None:
+        """删除已过期的条目（调用方需持有锁）"""
+        expired = [key for key, (expires_at, _, _) in self._data.items() if expires_at < now]
+        for key in expired:
+            del self._data[key]
+        if expired:
+            self._dirty = True
+    
+    def _rebuild_matrix(self) -> None:
+        """按当前条目重建句向量矩阵（调用方需持有锁）"""
+        self._keys = [key for key, (_, embedding, _) in self._data.items() if embedding is not None]
+        if self._keys:
+            self._matrix = np.vstack([self._data[key][1] for key in self._keys])
+        else:
+            self._matrix = None
+        self._dirty = False
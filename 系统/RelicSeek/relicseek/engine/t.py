@@ -8,6 +8,10 @@ from langchain_community.utilities import SearxSearchWrapper
 import pprint
 
 
+# 按(服务器地址, 结果数量, 引擎列表)复用已创建的搜索器
+_wrapper_cache = {}
+
+
 def search_with_searxng(searx_url, query, engines=None, count=10):
     """
     使用SearXNG进行搜索
@@ -36,7 +40,10 @@ def search_with_searxng(searx_url, query, engines=None, count=10):
     if engines:
         search_params["engines"] = engines
     
-    searcher = SearxSearchWrapper(**search_params)
+    key = (searx_url, count, tuple(engines or ()))
+    searcher = _wrapper_cache.get(key)
+    if searcher is None:
+        searcher = _wrapper_cache.setdefault(key, SearxSearchWrapper(**search_params))
     
     try:
         # 执行搜索
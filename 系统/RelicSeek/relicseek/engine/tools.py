@@ -1,24 +1,387 @@
 """
 外部工具集成模块
 """
+import asyncio
+import heapq
+import io
 import requests
+import aiohttp
 import json
 import logging
-from typing import Dict, List, Any, Optional
-from urllib.parse import urlencode, quote
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, Any, Optional, AsyncIterator, Callable, NamedTuple, Iterator
+from urllib.parse import urlencode, quote, urlsplit
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+from urllib3.util.retry import Retry
 import re
 from langchain.tools import Tool
-from langchain.pydantic_v1 import BaseModel, Field
 
+from .cache import TTLCache
 
-class SearchResult(BaseModel):
-    """搜索结果数据模型"""
-    title: str = Field(description="页面标题")
-    url: str = Field(description="页面URL")
-    content: str = Field(description="页面内容摘要")
-    score: float = Field(description="相关性评分", default=0.0)
-    source: str = Field(description="信息来源", default="")
+try:
+    import lxml  # noqa: F401
+    # 基于C实现的lxml解析器比纯Python的html.parser快得多
+    _HTML_PARSER = 'lxml'
+except ImportError:  # pragma: no cover - lxml为可选依赖
+    _HTML_PARSER = 'html.parser'
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - pyahocorasick为可选依赖
+    ahocorasick = None
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken为可选依赖
+    tiktoken = None
+
+
+class SearchResult(NamedTuple):
+    """搜索结果数据模型（数据来自SearXNG的JSON响应，无需校验）"""
+    title: str  # 页面标题
+    url: str  # 页面URL
+    content: str  # 页面内容摘要
+    score: float = 0.0  # 相关性评分
+    source: str = ""  # 信息来源
+
+
+# 内容清理和正文定位使用的预编译正则
+_STRIP_RE = re.compile(r'[^\w\s\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]')
+_MAIN_CLS_RE = re.compile(r'content|main|article')
+
+# 文物相关关键词，摘要提取时优先保留包含这些词的句子
+_IMPORTANT_KEYWORDS = (
+    '文物', '古迹', '遗址', '博物馆', '历史', '文化', '收藏', '展品',
+    '朝代', '年代', '考古', '古代', '文献', '艺术', '传统', '保护',
+    '世界遗产', '国宝', '珍品', '古董', '典藏', '陶瓷', '青铜', '玉器'
+)
+_KEYWORD_RE = re.compile('|'.join(re.escape(keyword) for keyword in _IMPORTANT_KEYWORDS))
+
+# 信息源权威性加分表，按顺序匹配，命中第一个即返回
+_AUTHORITY_TABLE = (
+    # 官方博物馆和文化机构
+    ('museum', 1.0), ('gov.cn', 1.0), ('palace', 1.0), ('cultural', 1.0),
+    # 学术机构和教育网站
+    ('edu.cn', 0.8), ('academic', 0.8), ('university', 0.8), ('scholar', 0.8),
+    # 权威百科网站
+    ('baike.baidu.com', 0.6), ('wikipedia', 0.6), ('britannica', 0.6),
+    # 专业文化媒体
+    ('cul.cn', 0.4), ('wenhua', 0.4), ('heritage', 0.4),
+)
+
+# 查询增强时判断是否已包含的文物相关关键词
+_RELIC_KEYWORDS = ("文物", "古代", "历史", "博物馆", "文化", "艺术")
+
+# 安装了pyahocorasick时，把权威域名和文物关键词编入同一个自动机，
+# 一次线性扫描即可找出全部命中；否则逐个子串判断
+if ahocorasick is not None:
+    _AUTOMATON = ahocorasick.Automaton()
+    for _domain, _bonus in _AUTHORITY_TABLE:
+        _AUTOMATON.add_word(_domain, ('authority', _bonus))
+    for _keyword in _RELIC_KEYWORDS:
+        _AUTOMATON.add_word(_keyword, ('relic', None))
+    _AUTOMATON.make_automaton()
+else:
+    _AUTOMATON = None
+
+
+@lru_cache(maxsize=4096)
+def _authority_bonus(url: str) -> float:
+    """根据信息源的权威性给予加分（按URL缓存）"""
+    if not url:
+        return 0.0
+    
+    url = url.lower()
+    if _AUTOMATON is not None:
+        # 各档加分从高到低排列，取命中的最高加分与按顺序匹配的结果一致
+        return max(
+            (value for _, (kind, value) in _AUTOMATON.iter(url) if kind == 'authority'),
+            default=0.0
+        )
+    
+    for domain, bonus in _AUTHORITY_TABLE:
+        if domain in url:
+            return bonus
+    return 0.0
+
+
+def _has_relic_keyword(query: str) -> bool:
+    """判断查询中是否已包含文物相关关键词"""
+    if _AUTOMATON is not None:
+        return any(kind == 'relic' for _, (kind, _) in _AUTOMATON.iter(query))
+    return any(keyword in query for keyword in _RELIC_KEYWORDS)
+
+
+# 匹配"scheme://netloc"，只取出URL中的主机部分，不必完整解析URL
+_NETLOC_RE = re.compile(r'^[a-z][a-z0-9+\-.]*://([^/?#]+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=8192)
+def _netloc(url: str) -> str:
+    """提取URL的主机名（小写，去掉用户信息和端口），无法识别时返回空字符串"""
+    match = _NETLOC_RE.match(url)
+    if not match:
+        return ""
+    
+    host = match.group(1).lower()
+    if '@' in host:
+        host = host.rsplit('@', 1)[1]
+    if host.startswith('['):
+        # IPv6地址形如[::1]:8080，保留方括号内的部分
+        host = host[:host.find(']') + 1]
+    elif ':' in host:
+        host = host.split(':', 1)[0]
+    return host
+
+
+# 去重时忽略的跟踪参数前缀
+_TRACKING_PARAMS = ('utm_', 'fbclid=', 'gclid=')
+
+
+def _canonical_url(url: str) -> str:
+    """
+    规范化URL用于结果去重
+    
+    忽略协议、www前缀、末尾斜杠、片段和跟踪参数，其余部分保持不变
+    """
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    
+    netloc = parts.netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    path = parts.path.rstrip('/') or '/'
+    query = '&'.join(
+        param for param in parts.query.split('&')
+        if param and not param.startswith(_TRACKING_PARAMS)
+    )
+    return f"{netloc}{path}?{query}" if query else f"{netloc}{path}"
+
+
+@lru_cache(maxsize=4096)
+def _source_domain(url: str) -> str:
+    """提取信息源域名（按URL缓存）"""
+    if not url:
+        return "未知来源"
+    
+    domain = _netloc(url)
+    
+    # 简化域名显示
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    
+    return domain
+
+
+@lru_cache(maxsize=4096)
+def _shorten_url(url: str) -> str:
+    """缩短URL显示，优先返回域名（按URL缓存）"""
+    if not url:
+        return ""
+    
+    # 提取域名
+    domain = _netloc(url)
+    if domain:
+        return domain
+    
+    # 如果无法识别域名，简单截断
+    if len(url) > 50:
+        return url[:47] + "..."
+    return url
+
+
+# 工具包搜索和网页提取结果的缓存容量及有效期（秒）
+_TOOL_CACHE_SIZE = 512
+_TOOL_CACHE_TTL = 900
+
+# 异步请求的最大并发数，避免压垮SearXNG服务和目标站点
+_MAX_CONCURRENT_REQUESTS = 16
+
+# 网页正文最多读取的字节数及每次读取的块大小，超出部分不再下载和解析
+_MAX_PAGE_BYTES = 1_000_000
+_READ_CHUNK_SIZE = 65536
+
+# 相关性评分只扫描内容摘要的前若干字符，相关性信号在此之前已经饱和
+_SCORE_CONTENT_CHARS = 512
+
+# 搜索完成后在后台预取正文的结果数、最低评分及预取线程数
+_PREFETCH_TOP_K = 4
+_PREFETCH_MIN_SCORE = 0.5
+_PREFETCH_WORKERS = 4
+
+
+@lru_cache(maxsize=1)
+def _token_encoding():
+    """获取tiktoken编码器；未安装或编码表不可用（首次使用需下载）时返回None"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding('cl100k_base')
+    except Exception:
+        return None
+
+
+def _length_budget(max_tokens: int) -> int:
+    """把token限制换算为_text_length的计量单位"""
+    if _token_encoding() is None:
+        # 粗略估算：1 token ≈ 4个中文字符 ≈ 3个英文字符
+        return max_tokens * 3
+    return max_tokens
+
+
+def _text_length(text: str) -> int:
+    """文本长度：有tiktoken时为准确的token数，否则为字符数"""
+    encoding = _token_encoding()
+    if encoding is None:
+        return len(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _truncate_text(text: str, limit: int) -> Optional[str]:
+    """把文本截断到limit个计量单位，未超出时返回None"""
+    encoding = _token_encoding()
+    if encoding is None:
+        return text[:limit] if len(text) > limit else None
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= limit:
+        return None
+    # 截断处可能落在多字节字符中间，去掉解码产生的替换字符
+    return encoding.decode(tokens[:max(limit, 0)]).rstrip('\ufffd')
+
+
+def _iter_sentences(text: str, separator: str = '。') -> Iterator[str]:
+    """按分隔符逐句产出文本（与str.split结果一致），不预先构建完整的句子列表"""
+    start = 0
+    while True:
+        end = text.find(separator, start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + len(separator)
+
+
+def _parse_batch_input(tool_input: str) -> Optional[List[str]]:
+    """解析工具的批量输入：JSON字符串列表返回列表，其他输入返回None"""
+    text = tool_input.strip()
+    if not text.startswith('['):
+        return None
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(items, list) and items and all(isinstance(item, str) for item in items):
+        return items
+    return None
+
+
+# 未声明编码时只在网页开头这么多字节内嗅探<meta charset>和探测编码
+_SNIFF_BYTES = 4096
+_HEADER_CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
+
+
+def _header_charset(content_type: str) -> Optional[str]:
+    """从Content-Type响应头中取出声明的字符集"""
+    match = _HEADER_CHARSET_RE.search(content_type)
+    return match.group(1) if match else None
+
+
+def _decode_html(data: bytes, declared: Optional[str]) -> tuple:
+    """
+    解码网页字节内容
+    
+    依次采用响应头声明的编码、网页开头<meta>声明的编码、对开头片段的编码探测，
+    都不可用时按UTF-8解码；不对整个正文做编码探测
+    
+    Returns:
+        (解码后的文本, 使用的编码)
+    """
+    encoding = declared
+    if not encoding:
+        match = _META_CHARSET_RE.search(data, 0, _SNIFF_BYTES)
+        if match:
+            encoding = match.group(1).decode('ascii')
+    if not encoding and chardet is not None:
+        encoding = chardet.detect(data[:_SNIFF_BYTES])['encoding']
+        # 开头片段全是ASCII时无法区分编码，按其超集UTF-8处理
+        if encoding and encoding.lower() == 'ascii':
+            encoding = None
+    encoding = encoding or 'utf-8'
+    
+    try:
+        return data.decode(encoding, errors='replace'), encoding
+    except LookupError:
+        return data.decode('utf-8', errors='replace'), 'utf-8'
+
+
+def _create_pooled_session() -> requests.Session:
+    """创建带连接池和重试策略的HTTP会话，复用到同一主机的长连接"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+class _AsyncSessionHolder:
+    """
+    按事件循环惰性创建并复用aiohttp会话（aiohttp会话不能跨事件循环使用）
+    
+    多个线程可能各自运行事件循环并共用同一个工具包，每个循环持有自己的会话和并发信号量，
+    循环结束被回收后对应条目自动移除
+    """
+    
+    def __init__(self, headers: Dict[str, str], timeout: int):
+        self._headers = headers
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        # 事件循环 -> (aiohttp会话, 并发信号量)
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+    
+    def _session_for(self, loop: asyncio.AbstractEventLoop):
+        """获取当前事件循环的会话和信号量，不存在或已关闭时新建"""
+        with self._lock:
+            entry = self._sessions.get(loop)
+            if entry is None or entry[0].closed:
+                entry = (
+                    aiohttp.ClientSession(headers=self._headers, timeout=self._timeout),
+                    asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+                )
+                self._sessions[loop] = entry
+            return entry
+    
+    @asynccontextmanager
+    async def get(self, url: str, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        """在并发上限内发送GET请求"""
+        session, semaphore = self._session_for(asyncio.get_running_loop())
+        async with semaphore:
+            async with session.get(url, **kwargs) as response:
+                yield response
+    
+    async def close(self) -> None:
+        """关闭当前事件循环的aiohttp会话，其他循环的会话不受影响"""
+        with self._lock:
+            entry = self._sessions.pop(asyncio.get_running_loop(), None)
+        if entry is not None and not entry[0].closed:
+            await entry[0].close()
 
 
 class SearxngTool:
@@ -37,7 +400,7 @@ class SearxngTool:
         self.base_url = base_url.rstrip('/')
         self.language = language
         self.timeout = timeout
-        self.session = requests.Session()
+        self.session = _create_pooled_session()
         
         # 设置日志
         self.logger = logging.getLogger(__name__)
@@ -48,6 +411,17 @@ class SearxngTool:
             'Accept': 'application/json, text/html, */*',
             'Accept-Language': language
         })
+        self._async = _AsyncSessionHolder(dict(self.session.headers), timeout)
+        
+        # 请求地址和固定参数只构建一次，每次搜索只需填入查询词
+        self._search_url = f"{self.base_url}/search"
+        self._base_params = {
+            'format': 'json',
+            'language': language,
+            'safesearch': '1'
+        }
+        # 按(分类, 引擎)缓存已拼接好的参数模板，工具包通常固定使用同一组
+        self._params_templates: Dict[tuple, Dict[str, str]] = {}
     
     def search(self, query: str, categories: List[str] = None, 
                engines: List[str] = None, max_results: int = 20) -> List[SearchResult]:
@@ -64,75 +438,45 @@ class SearxngTool:
             搜索结果列表
         """
         try:
-            # 打印搜索调试信息
-            self.logger.info("=" * 60)
-            self.logger.info("🔍 开始执行SearXNG搜索")
-            self.logger.info(f"📝 搜索关键词: {query}")
-            self.logger.info(f"🌐 搜索语言: {self.language}")
-            self.logger.info(f"📂 搜索分类: {categories or ['general']}")
-            self.logger.info(f"🔧 搜索引擎: {engines or ['default']}")
-            self.logger.info(f"📊 最大结果数: {max_results}")
-            self.logger.info(f"🌍 服务地址: {self.base_url}")
-            
-            # 构建搜索参数
-            params = {
-                'q': query,
-                'format': 'json',
-                'language': self.language,
-                'safesearch': '1'
-            }
-            
-            if categories:
-                params['categories'] = ','.join(categories)
-            if engines:
-                params['engines'] = ','.join(engines)
-            
-            self.logger.info(f"📋 搜索参数: {params}")
-            
-            # 发送搜索请求
-            search_url = f"{self.base_url}/search"
-            self.logger.info(f"🚀 发送请求到: {search_url}")
+            search_url, params = self._prepare_search(query, categories, engines, max_results)
             
             response = self.session.get(search_url, params=params, timeout=self.timeout)
             response.raise_for_status()
             
-            self.logger.info(f"✅ 请求成功，状态码: {response.status_code}")
+            self.logger.debug("✅ 请求成功，状态码: %s", response.status_code)
             
             # 解析搜索结果
             data = response.json()
-            raw_results = data.get('results', [])
-            
-            self.logger.info(f"📥 收到原始结果数量: {len(raw_results)}")
+            return self._build_results(data, query, max_results)
             
-            results = []
+        except requests.RequestException as e:
+            self.logger.error(f"❌ SearXNG搜索失败: {str(e)}")
+            raise Exception(f"SearXNG搜索失败: {str(e)}")
+        except json.JSONDecodeError:
+            self.logger.error("❌ SearXNG返回数据格式错误")
+            raise Exception("SearXNG返回数据格式错误")
+        except Exception as e:
+            self.logger.error(f"❌ 搜索过程中出现错误: {str(e)}")
+            raise Exception(f"搜索过程中出现错误: {str(e)}")
+    
+    async def asearch(self, query: str, categories: List[str] = None, 
+                      engines: List[str] = None, max_results: int = 20) -> List[SearchResult]:
+        """
+        异步执行搜索查询，参数和返回值与search相同
+        """
+        try:
+            search_url, params = self._prepare_search(query, categories, engines, max_results)
             
-            for i, item in enumerate(raw_results[:max_results]):
-                result = SearchResult(
-                    title=item.get('title', ''),
-                    url=item.get('url', ''),
-                    content=item.get('content', ''),
-                    score=self._calculate_relevance_score(item, query),
-                    source=self._extract_source_domain(item.get('url', ''))
-                )
-                results.append(result)
+            async with self._async.get(search_url, params=params) as response:
+                response.raise_for_status()
                 
-                # 打印每个搜索结果的详细信息
-                self.logger.info(f"📄 结果 {i+1}:")
-                self.logger.info(f"   📌 标题: {result.title[:100]}{'...' if len(result.title) > 100 else ''}")
-                self.logger.info(f"   🔗 URL: {result.url}")
-                self.logger.info(f"   📝 内容摘要: {result.content[:150]}{'...' if len(result.content) > 150 else ''}")
-                self.logger.info(f"   ⭐ 相关性评分: {result.score:.2f}")
-                self.logger.info(f"   🏢 来源: {result.source}")
-            
-            # 按相关性排序
-            results.sort(key=lambda x: x.score, reverse=True)
-            
-            self.logger.info(f"🎯 最终返回结果数量: {len(results)}")
-            self.logger.info("=" * 60)
-            
-            return results
+                self.logger.debug("✅ 请求成功，状态码: %s", response.status)
+                
+                # 解析搜索结果
+                data = await response.json(content_type=None)
+            return self._build_results(data, query, max_results)
             
-        except requests.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             self.logger.error(f"❌ SearXNG搜索失败: {str(e)}")
             raise Exception(f"SearXNG搜索失败: {str(e)}")
         except json.JSONDecodeError:
@@ -142,86 +486,153 @@ class SearxngTool:
             self.logger.error(f"❌ 搜索过程中出现错误: {str(e)}")
             raise Exception(f"搜索过程中出现错误: {str(e)}")
     
-    def _calculate_relevance_score(self, item: Dict[str, Any], query: str) -> float:
-        """计算搜索结果的相关性评分"""
-        score = 0.0
-        query_terms = set(query.lower().split())
+    def _prepare_search(self, query: str, categories: Optional[List[str]],
+                        engines: Optional[List[str]], max_results: int):
+        """构建搜索请求的URL和参数"""
+        # 构建搜索参数
+        params = {'q': query, **self._params_template(categories, engines)}
+        search_url = self._search_url
         
-        # 标题匹配度
-        title = item.get('title', '').lower()
-        title_matches = sum(1 for term in query_terms if term in title)
-        score += title_matches * 0.4
+        # 打印搜索调试信息（仅DEBUG级别）
+        self.logger.debug(
+            "🔍 开始执行SearXNG搜索 url=%s max_results=%s params=%s",
+            search_url, max_results, params
+        )
         
-        # 内容匹配度
-        content = item.get('content', '').lower()
-        content_matches = sum(1 for term in query_terms if term in content)
-        score += content_matches * 0.3
+        return search_url, params
+    
+    def _params_template(self, categories: Optional[List[str]],
+                         engines: Optional[List[str]]) -> Dict[str, str]:
+        """获取除查询词外的搜索参数"""
+        key = (tuple(categories or ()), tuple(engines or ()))
+        template = self._params_templates.get(key)
+        if template is None:
+            template = dict(self._base_params)
+            if categories:
+                template['categories'] = ','.join(categories)
+            if engines:
+                template['engines'] = ','.join(engines)
+            template = self._params_templates.setdefault(key, template)
+        return template
+    
+    def _build_results(self, data: Dict[str, Any], query: str, max_results: int) -> List[SearchResult]:
+        """将SearXNG返回的数据转换为按相关性排序的搜索结果"""
+        raw_results = data.get('results', [])
         
-        # URL匹配度
-        url = item.get('url', '').lower()
-        url_matches = sum(1 for term in query_terms if term in url)
-        score += url_matches * 0.1
+        # 多个引擎常返回同一页面，按规范化URL去重后再评分（保留先出现的结果）
+        seen = set()
+        unique_results = []
+        for item in raw_results:
+            key = _canonical_url(item.get('url', ''))
+            if key not in seen:
+                seen.add(key)
+                unique_results.append(item)
         
-        # 权威性加权
-        source_bonus = self._get_source_authority_bonus(item.get('url', ''))
-        score += source_bonus
+        # 对原始结果评分，只保留评分最高的max_results个（按相关性从高到低）
+        scorer = self._make_scorer(query)
+        top_results = heapq.nlargest(
+            max_results, ((scorer(item), item) for item in unique_results), key=itemgetter(0)
+        )
         
-        return min(score, 5.0)  # 限制最高分为5分
-    
-    def _get_source_authority_bonus(self, url: str) -> float:
-        """根据信息源的权威性给予加分"""
-        if not url:
-            return 0.0
+        # 只为保留下来的结果构建SearchResult
+        results = [
+            SearchResult(
+                title=item.get('title', ''),
+                url=item.get('url', ''),
+                content=item.get('content', ''),
+                score=score,
+                source=self._extract_source_domain(item.get('url', ''))
+            )
+            for score, item in top_results
+        ]
         
-        url = url.lower()
+        # 打印每个搜索结果的详细信息（仅DEBUG级别）
+        if self.logger.isEnabledFor(logging.DEBUG):
+            for i, result in enumerate(results, 1):
+                self.logger.debug(
+                    "📄 结果 %d: 标题=%.100s URL=%s 摘要=%.150s 评分=%.2f 来源=%s",
+                    i, result.title, result.url, result.content, result.score, result.source
+                )
         
-        # 官方博物馆和文化机构
-        if any(domain in url for domain in ['museum', 'gov.cn', 'palace', 'cultural']):
-            return 1.0
+        self.logger.info(
+            "🔍 SearXNG搜索完成 query=%s raw=%d unique=%d returned=%d",
+            query, len(raw_results), len(unique_results), len(results)
+        )
         
-        # 学术机构和教育网站
-        if any(domain in url for domain in ['edu.cn', 'academic', 'university', 'scholar']):
-            return 0.8
+        return results
+    
+    def _calculate_relevance_score(self, item: Dict[str, Any], query: str) -> float:
+        """计算搜索结果的相关性评分"""
+        return self._make_scorer(query)(item)
+    
+    def _make_scorer(self, query: str) -> Callable[[Dict[str, Any]], float]:
+        """构建绑定查询的相关性评分函数，查询词只在构建时切分一次"""
+        query_terms = tuple(set(query.lower().split()))
+        authority_bonus = self._get_source_authority_bonus
         
-        # 权威百科网站
-        if any(domain in url for domain in ['baike.baidu.com', 'wikipedia', 'britannica']):
-            return 0.6
+        # 统计字段中出现的查询词个数，每个词单独判断是否出现，
+        # 互相包含的词（如"青铜"和"青铜器"）各自计数
+        def count_terms(text: str) -> int:
+            if not query_terms:
+                return 0
+            text = text.lower()
+            return sum(1 for term in query_terms if term in text)
         
-        # 专业文化媒体
-        if any(domain in url for domain in ['cul.cn', 'wenhua', 'heritage']):
-            return 0.4
+        def score_item(item: Dict[str, Any]) -> float:
+            score = 0.0
+            
+            # 标题匹配度
+            title_matches = count_terms(item.get('title', ''))
+            score += title_matches * 0.4
+            
+            # 内容匹配度（只看开头部分，每个结果的评分开销有上限）
+            content_matches = count_terms(item.get('content', '')[:_SCORE_CONTENT_CHARS])
+            score += content_matches * 0.3
+            
+            # URL匹配度
+            url = item.get('url', '')
+            url_matches = count_terms(url)
+            score += url_matches * 0.1
+            
+            # 权威性加权
+            source_bonus = authority_bonus(url)
+            score += source_bonus
+            
+            return min(score, 5.0)  # 限制最高分为5分
         
-        return 0.0
+        return score_item
+    
+    def _get_source_authority_bonus(self, url: str) -> float:
+        """根据信息源的权威性给予加分"""
+        return _authority_bonus(url)
     
     def _extract_source_domain(self, url: str) -> str:
         """提取信息源域名"""
-        if not url:
-            return "未知来源"
-        
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-            domain = parsed.netloc
-            
-            # 简化域名显示
-            if domain.startswith('www.'):
-                domain = domain[4:]
-            
-            return domain
-        except:
-            return "未知来源"
+        return _source_domain(url)
+    
+    def close(self):
+        """关闭HTTP会话"""
+        self.session.close()
+    
+    async def aclose(self):
+        """关闭异步HTTP会话"""
+        await self._async.close()
 
 
 class WebContentExtractor:
     """网页内容提取器"""
     
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, max_bytes: int = _MAX_PAGE_BYTES):
         self.timeout = timeout
-        self.session = requests.Session()
+        self.max_bytes = max_bytes
+        self.session = _create_pooled_session()
         self.session.headers.update({
             'User-Agent': 'RelicSeek/1.0 (Cultural Heritage Search System)',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            # 显式声明压缩编码，避免代理配置不当时退化为未压缩传输
+            'Accept-Encoding': DEFAULT_ACCEPT_ENCODING
         })
+        self._async = _AsyncSessionHolder(dict(self.session.headers), timeout)
         
         # 设置日志
         self.logger = logging.getLogger(__name__)
@@ -238,97 +649,151 @@ class WebContentExtractor:
             包含标题、正文内容的字典
         """
         try:
-            # 打印内容提取调试信息
-            self.logger.info("=" * 50)
-            self.logger.info("📄 开始提取网页内容")
-            self.logger.info(f"🔗 目标URL: {url}")
-            self.logger.info(f"📏 最大内容长度: {max_length}")
-            
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            response.encoding = response.apparent_encoding or 'utf-8'
-            
-            self.logger.info(f"✅ 网页请求成功，状态码: {response.status_code}")
-            self.logger.info(f"📝 响应编码: {response.encoding}")
-            self.logger.info(f"📊 响应内容长度: {len(response.text)} 字符")
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 移除脚本和样式标签
-            for tag in soup(['script', 'style', 'nav', 'footer', 'aside']):
-                tag.decompose()
-            
-            # 提取标题
-            title = ""
-            if soup.title:
-                title = soup.title.get_text().strip()
+            # 打印内容提取调试信息（仅DEBUG级别）
+            self.logger.debug("📄 开始提取网页内容 url=%s max_length=%s", url, max_length)
             
-            self.logger.info(f"📌 提取到标题: {title[:100]}{'...' if len(title) > 100 else ''}")
+            # 流式读取正文，超过字节上限后不再继续下载
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                buffer = bytearray()
+                for chunk in response.iter_content(_READ_CHUNK_SIZE):
+                    buffer.extend(chunk)
+                    if len(buffer) >= self.max_bytes:
+                        break
+                status_code = response.status_code
             
-            # 提取正文内容
-            content = ""
-            
-            # 优先寻找主要内容区域
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main|article'))
-            
-            if main_content:
-                content = main_content.get_text()
-                self.logger.info("🎯 使用主要内容区域提取内容")
-            else:
-                # 如果找不到主要内容区域，则提取body中的文本
-                body = soup.find('body')
-                if body:
-                    content = body.get_text()
-                    self.logger.info("📄 使用body区域提取内容")
-                else:
-                    content = soup.get_text()
-                    self.logger.info("🌐 使用整个页面提取内容")
+            html, encoding = _decode_html(
+                bytes(buffer), _header_charset(response.headers.get('Content-Type', ''))
+            )
             
-            # 清理内容
-            original_length = len(content)
-            content = self._clean_content(content)
-            cleaned_length = len(content)
+            self.logger.debug(
+                "✅ 网页请求成功 status=%s encoding=%s length=%d",
+                status_code, encoding, len(html)
+            )
             
-            self.logger.info(f"🧹 内容清理: {original_length} -> {cleaned_length} 字符")
+            return self._parse_page(html, url, max_length)
             
-            # 截断过长的内容
-            if len(content) > max_length:
-                content = content[:max_length] + "..."
-                self.logger.info(f"✂️ 内容截断到 {max_length} 字符")
+        except Exception as e:
+            return self._extraction_failed(url, e)
+    
+    async def aextract_content(self, url: str, max_length: int = 5000) -> Dict[str, str]:
+        """
+        异步提取网页内容，参数和返回值与extract_content相同
+        """
+        try:
+            # 打印内容提取调试信息（仅DEBUG级别）
+            self.logger.debug("📄 开始提取网页内容 url=%s max_length=%s", url, max_length)
             
-            self.logger.info(f"📋 最终内容长度: {len(content)} 字符")
-            self.logger.info("=" * 50)
+            async with self._async.get(url) as response:
+                response.raise_for_status()
+                # 分块读取正文，超过字节上限后不再继续下载
+                buffer = bytearray()
+                async for chunk in response.content.iter_chunked(_READ_CHUNK_SIZE):
+                    buffer.extend(chunk)
+                    if len(buffer) >= self.max_bytes:
+                        break
+                
+                html, encoding = _decode_html(bytes(buffer), response.charset)
+                
+                self.logger.debug(
+                    "✅ 网页请求成功 status=%s encoding=%s length=%d",
+                    response.status, encoding, len(html)
+                )
             
-            return {
-                'title': title,
-                'content': content,
-                'url': url
-            }
+            # HTML解析是CPU密集操作，放到线程池中执行，避免阻塞事件循环上的其他请求
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._parse_page, html, url, max_length)
             
         except Exception as e:
-            self.logger.error(f"❌ 内容提取失败: {str(e)}")
-            return {
-                'title': f"内容提取失败: {str(e)}",
-                'content': "",
-                'url': url
-            }
+            return self._extraction_failed(url, e)
+    
+    def _parse_page(self, html: str, url: str, max_length: int) -> Dict[str, str]:
+        """解析网页HTML，提取标题和正文内容"""
+        soup = BeautifulSoup(html, _HTML_PARSER)
+        
+        # 移除脚本和样式标签
+        for tag in soup(['script', 'style', 'nav', 'footer', 'aside']):
+            tag.decompose()
+        
+        # 提取标题
+        title = ""
+        if soup.title:
+            title = soup.title.get_text().strip()
+        
+        self.logger.debug("📌 提取到标题: %.100s", title)
+        
+        # 提取正文内容：只遍历选中的子树，文本节点在BeautifulSoup内部去除首尾空白并以空格连接
+        content = ""
+        
+        # 优先寻找主要内容区域
+        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=_MAIN_CLS_RE)
+        
+        if main_content:
+            content = main_content.get_text(separator=' ', strip=True)
+            self.logger.debug("🎯 使用主要内容区域提取内容")
+        else:
+            # 如果找不到主要内容区域，则提取body中的文本
+            body = soup.find('body')
+            if body:
+                content = body.get_text(separator=' ', strip=True)
+                self.logger.debug("📄 使用body区域提取内容")
+            else:
+                content = soup.get_text(separator=' ', strip=True)
+                self.logger.debug("🌐 使用整个页面提取内容")
+        
+        # 清理内容
+        original_length = len(content)
+        content = self._clean_content(content)
+        cleaned_length = len(content)
+        
+        self.logger.debug("🧹 内容清理: %d -> %d 字符", original_length, cleaned_length)
+        
+        # 截断过长的内容
+        if len(content) > max_length:
+            content = content[:max_length] + "..."
+            self.logger.debug("✂️ 内容截断到 %d 字符", max_length)
+        
+        self.logger.info("📄 网页内容提取完成 url=%s length=%d", url, len(content))
+        
+        return {
+            'title': title,
+            'content': content,
+            'url': url
+        }
+    
+    def _extraction_failed(self, url: str, error: Exception) -> Dict[str, str]:
+        """记录提取失败并返回错误结果"""
+        self.logger.error(f"❌ 内容提取失败: {str(error)}")
+        return {
+            'title': f"内容提取失败: {str(error)}",
+            'content': "",
+            'url': url
+        }
     
     def _clean_content(self, content: str) -> str:
         """清理提取的内容"""
         if not content:
             return ""
         
-        # 移除多余的空白字符
-        content = re.sub(r'\s+', ' ', content)
+        # 移除多余的空白字符（str.split按任意空白切分，由C实现，比正则替换快）
+        content = ' '.join(content.split())
         
         # 移除特殊字符
-        content = re.sub(r'[^\w\s\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]', ' ', content)
+        content = _STRIP_RE.sub(' ', content)
         
         # 移除过短的行
         lines = content.split('\n')
         cleaned_lines = [line.strip() for line in lines if len(line.strip()) > 10]
         
         return '\n'.join(cleaned_lines).strip()
+    
+    def close(self):
+        """关闭HTTP会话"""
+        self.session.close()
+    
+    async def aclose(self):
+        """关闭异步HTTP会话"""
+        await self._async.close()
 
 
 class RelicSearchToolkit:
@@ -360,9 +825,21 @@ class RelicSearchToolkit:
         self.max_results_per_query = search_config.get('max_results_per_query', 10)
         self.token_limit = search_config.get('token_limit', 3000)  # 默认3000 tokens
         
-        self.logger.info("🔧 RelicSearchToolkit 初始化完成")
-        self.logger.info(f"📂 默认搜索分类: {self.default_categories}")
-        self.logger.info(f"🔧 默认搜索引擎: {self.default_engines}")
+        # 智能体多步推理和重试时常重复相同的查询和URL，短时缓存其结果
+        self._search_cache = TTLCache(max_size=_TOOL_CACHE_SIZE, ttl=_TOOL_CACHE_TTL)
+        self._extract_cache = TTLCache(max_size=_TOOL_CACHE_SIZE, ttl=_TOOL_CACHE_TTL)
+        
+        # 智能体通常会接着查看排名靠前的网页，搜索后在后台预取其正文；
+        # 进行中的预取按URL记录，完成后结果写入_extract_cache
+        self._prefetch_pool = ThreadPoolExecutor(
+            max_workers=_PREFETCH_WORKERS, thread_name_prefix="relic-prefetch"
+        )
+        self._prefetch_futures: Dict[str, Future] = {}
+        
+        self.logger.info(
+            "🔧 RelicSearchToolkit 初始化完成 categories=%s engines=%s",
+            self.default_categories, self.default_engines
+        )
     
     def search_relics(self, query: str, max_results: int = None) -> List[Dict[str, Any]]:
         """
@@ -376,18 +853,11 @@ class RelicSearchToolkit:
             搜索结果列表
         """
         try:
-            # 使用配置的默认值
-            if max_results is None:
-                max_results = self.max_results_per_query
+            cache_key, cached = self._cached_search(query, max_results)
+            if cached is not None:
+                return cached
             
-            # 打印工具包搜索调试信息
-            self.logger.info("🏛️ 开始执行文物搜索")
-            self.logger.info(f"📝 原始查询: {query}")
-            self.logger.info(f"📊 最大结果数: {max_results}")
-            
-            # 增强查询词，添加文物相关关键词
-            enhanced_query = self._enhance_query(query)
-            self.logger.info(f"🔍 增强后查询: {enhanced_query}")
+            enhanced_query, max_results = self._prepare_relic_search(query, max_results)
             
             # 执行搜索
             results = self.searxng.search(
@@ -397,34 +867,114 @@ class RelicSearchToolkit:
                 max_results=max_results
             )
             
-            self.logger.info(f"✅ 搜索完成，获得 {len(results)} 个结果")
-            
-            # 转换为字典格式
-            formatted_results = [
-                {
-                    'title': result.title,
-                    'url': result.url,
-                    'content': result.content,
-                    'score': result.score,
-                    'source': result.source
-                }
-                for result in results
-            ]
-            
-            # 打印结果摘要
-            self.logger.info("📋 搜索结果摘要:")
-            for i, result in enumerate(formatted_results[:5]):  # 只显示前5个结果
-                self.logger.info(f"  {i+1}. {result['title'][:50]}... (评分: {result['score']:.2f})")
+            formatted_results = self._results_to_dicts(results)
+            self._search_cache.set(cache_key, list(formatted_results))
+            self._prefetch_top_pages(formatted_results)
+            return formatted_results
             
-            if len(formatted_results) > 5:
-                self.logger.info(f"  ... 还有 {len(formatted_results) - 5} 个结果")
+        except Exception as e:
+            self.logger.error(f"❌ 文物搜索失败: {str(e)}")
+            return [{'error': f"搜索失败: {str(e)}"}]
+    
+    async def asearch_relics(self, query: str, max_results: int = None) -> List[Dict[str, Any]]:
+        """
+        异步搜索文物相关信息，参数和返回值与search_relics相同
+        """
+        try:
+            cache_key, cached = self._cached_search(query, max_results)
+            if cached is not None:
+                return cached
+            
+            enhanced_query, max_results = self._prepare_relic_search(query, max_results)
             
+            # 执行搜索
+            results = await self.searxng.asearch(
+                query=enhanced_query,
+                categories=self.default_categories,
+                engines=self.default_engines,
+                max_results=max_results
+            )
+            
+            formatted_results = self._results_to_dicts(results)
+            self._search_cache.set(cache_key, list(formatted_results))
+            # 预取在工具包自己的线程池中进行，不依赖本次搜索的事件循环
+            self._prefetch_top_pages(formatted_results)
             return formatted_results
             
         except Exception as e:
             self.logger.error(f"❌ 文物搜索失败: {str(e)}")
             return [{'error': f"搜索失败: {str(e)}"}]
     
+    def _cached_search(self, query: str, max_results: Optional[int]):
+        """
+        查找缓存的搜索结果
+        
+        Returns:
+            (缓存键, 缓存结果的副本)，未命中时结果为None
+        """
+        if max_results is None:
+            max_results = self.max_results_per_query
+        cache_key = (query.strip().lower(), max_results, tuple(self.default_engines))
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            self.logger.debug("♻️ 命中文物搜索缓存: %s", query)
+            cached = list(cached)
+        return cache_key, cached
+    
+    def _prepare_relic_search(self, query: str, max_results: Optional[int]):
+        """确定结果数量并增强查询词"""
+        # 使用配置的默认值
+        if max_results is None:
+            max_results = self.max_results_per_query
+        
+        # 增强查询词，添加文物相关关键词
+        enhanced_query = self._enhance_query(query)
+        
+        # 打印工具包搜索调试信息（仅DEBUG级别）
+        self.logger.debug(
+            "🏛️ 开始执行文物搜索 query=%s enhanced=%s max_results=%s",
+            query, enhanced_query, max_results
+        )
+        
+        return enhanced_query, max_results
+    
+    def _results_to_dicts(self, results: List[SearchResult]) -> List[Dict[str, Any]]:
+        """将搜索结果转换为字典格式"""
+        # 转换为字典格式
+        formatted_results = [result._asdict() for result in results]
+        
+        # 打印结果摘要（仅DEBUG级别）
+        if self.logger.isEnabledFor(logging.DEBUG):
+            for i, result in enumerate(formatted_results[:5], 1):  # 只显示前5个结果
+                self.logger.debug("📋 %d. %.50s... (评分: %.2f)", i, result['title'], result['score'])
+            
+            if len(formatted_results) > 5:
+                self.logger.debug("📋 ... 还有 %d 个结果", len(formatted_results) - 5)
+        
+        return formatted_results
+    
+    def _prefetch_top_pages(self, results: List[Dict[str, Any]]) -> None:
+        """在后台预取高相关性结果的网页正文"""
+        candidates = [
+            result['url'] for result in results[:_PREFETCH_TOP_K]
+            if result.get('score', 0) > _PREFETCH_MIN_SCORE and result.get('url')
+        ]
+        for url in candidates:
+            if url in self._prefetch_futures or self._extract_cache.get(url) is not None:
+                continue
+            try:
+                future = self._prefetch_pool.submit(self._prefetch_page, url)
+            except RuntimeError:  # 工具包已关闭
+                return
+            self._prefetch_futures[url] = future
+            future.add_done_callback(lambda _, url=url: self._prefetch_futures.pop(url, None))
+    
+    def _prefetch_page(self, url: str) -> Dict[str, str]:
+        """预取任务：提取网页内容并写入缓存"""
+        result = self.extractor.extract_content(url)
+        self._cache_extracted(url, result)
+        return result
+    
     def extract_page_content(self, url: str) -> Dict[str, str]:
         """
         提取网页详细内容
@@ -435,17 +985,108 @@ class RelicSearchToolkit:
         Returns:
             网页内容字典
         """
-        self.logger.info(f"📄 开始提取网页内容: {url}")
+        cached = self._extract_cache.get(url)
+        if cached is not None:
+            self.logger.debug("♻️ 命中网页内容缓存: %s", url)
+            return dict(cached)
+        
+        # 后台预取仍在进行时等待其结果，预取超时或失败则重新提取
+        future = self._prefetch_futures.get(url)
+        if future is not None:
+            try:
+                result = future.result(timeout=self.extractor.timeout + 2)
+                self.logger.debug("♻️ 使用预取的网页内容: %s", url)
+                return dict(result)
+            except Exception:
+                pass
+        
+        self.logger.debug("📄 开始提取网页内容: %s", url)
         result = self.extractor.extract_content(url)
-        self.logger.info(f"✅ 网页内容提取完成")
+        self.logger.debug("✅ 网页内容提取完成")
+        self._cache_extracted(url, result)
+        return result
+    
+    async def aextract_page_content(self, url: str) -> Dict[str, str]:
+        """异步提取网页详细内容"""
+        cached = self._extract_cache.get(url)
+        if cached is not None:
+            self.logger.debug("♻️ 命中网页内容缓存: %s", url)
+            return dict(cached)
+        
+        # 后台预取仍在进行时等待其结果，预取超时或失败则重新提取
+        future = self._prefetch_futures.get(url)
+        if future is not None:
+            try:
+                result = await asyncio.wait_for(
+                    asyncio.wrap_future(future), timeout=self.extractor.timeout + 2
+                )
+                self.logger.debug("♻️ 使用预取的网页内容: %s", url)
+                return dict(result)
+            except Exception:
+                pass
+        
+        self.logger.debug("📄 开始提取网页内容: %s", url)
+        result = await self.extractor.aextract_content(url)
+        self.logger.debug("✅ 网页内容提取完成")
+        self._cache_extracted(url, result)
         return result
     
+    def _cache_extracted(self, url: str, result: Dict[str, str]) -> None:
+        """缓存提取到正文的网页内容，提取失败或无正文的结果不缓存"""
+        if result.get('content'):
+            self._extract_cache.set(url, dict(result))
+    
+    def search_relics_many(self, queries: List[str], max_workers: int = 8) -> List[List[Dict[str, Any]]]:
+        """
+        并发执行多个文物搜索查询
+        
+        Args:
+            queries: 搜索查询列表
+            max_workers: 最大并发数
+            
+        Returns:
+            与queries顺序一致的搜索结果列表
+        """
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="relic-search") as executor:
+            return list(executor.map(self.search_relics, queries))
+    
+    async def asearch_relics_many(self, queries: List[str]) -> List[List[Dict[str, Any]]]:
+        """异步并发执行多个文物搜索查询，返回与queries顺序一致的结果列表"""
+        return await asyncio.gather(*(self.asearch_relics(query) for query in queries))
+    
+    def extract_page_content_many(self, urls: List[str], max_workers: int = 8) -> List[Dict[str, str]]:
+        """
+        并发提取多个网页的内容
+        
+        Args:
+            urls: 网页URL列表
+            max_workers: 最大并发数
+            
+        Returns:
+            与urls顺序一致的网页内容列表
+        """
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="relic-extract") as executor:
+            return list(executor.map(self.extract_page_content, urls))
+    
+    async def aextract_many(self, urls: List[str]) -> List[Any]:
+        """
+        并发提取多个网页的内容
+        
+        Args:
+            urls: 网页URL列表
+            
+        Returns:
+            与urls顺序一致的结果列表，单个任务出现异常时对应位置为该异常
+        """
+        return await asyncio.gather(
+            *(self.aextract_page_content(url) for url in urls),
+            return_exceptions=True
+        )
+    
     def _enhance_query(self, query: str) -> str:
         """增强搜索查询，添加文物相关关键词"""
-        relic_keywords = ["文物", "古代", "历史", "博物馆", "文化", "艺术"]
-        
         # 如果查询中没有文物相关关键词，则添加
-        if not any(keyword in query for keyword in relic_keywords):
+        if not _has_relic_keyword(query):
             query = f"{query} 文物"
         
         return query
@@ -456,7 +1097,7 @@ class RelicSearchToolkit:
         
         Args:
             results: 搜索结果列表
-            max_tokens: 最大token数（粗略估算，1token约4个中文字符）
+            max_tokens: 最大token数（未安装tiktoken时按1token约3个字符粗略估算）
             
         Returns:
             格式化的结果字符串
@@ -468,45 +1109,41 @@ class RelicSearchToolkit:
         if max_tokens is None:
             max_tokens = self.token_limit
         
-        # 粗略估算：1 token ≈ 4个中文字符 ≈ 3个英文字符
-        max_chars = max_tokens * 3
-        formatted_results = []
-        current_length = 0
+        budget = _length_budget(max_tokens)
+        
+        # 所有片段写入同一个缓冲区，单独维护已写入的长度
+        buf = io.StringIO()
         
         # 添加头部信息
         header = f"找到 {len(results)} 个相关文物信息：\n\n"
-        formatted_results.append(header)
-        current_length += len(header)
+        buf.write(header)
+        current_length = _text_length(header)
         
         for i, result in enumerate(results[:8]):  # 最多处理前8个结果，进一步减少
             # 智能截断标题和内容，保留关键信息
             title = self._extract_key_info(result.get('title', '无标题'), 80)
             content = self._extract_key_info(result.get('content', '无内容'), 150)
-            url = result.get('url', '')
-            score = result.get('score', 0)
-            
-            # 构建单个结果的字符串，简化格式
-            result_str = f"{i+1}. {title}\n"
-            result_str += f"   {content}\n"
-            if score > 0.5:  # 只显示高相关性的来源
-                result_str += f"   来源：{self._shorten_url(url)}\n"
-            result_str += "\n"
-            
-            # 检查是否会超出长度限制
-            if current_length + len(result_str) > max_chars:
-                # 如果添加当前结果会超出限制，则停止添加
-                remaining_count = len(results) - i
-                if remaining_count > 0:
-                    formatted_results.append(f"... 还有 {remaining_count} 个结果因长度限制未显示")
+            
+            # 构建单个结果的字符串，简化格式；只显示高相关性的来源
+            if result.get('score', 0) > 0.5:
+                source = f"   来源：{self._shorten_url(result.get('url', ''))}\n"
+            else:
+                source = ""
+            result_str = f"{i+1}. {title}\n   {content}\n{source}\n"
+            
+            # 检查是否会超出长度限制，超出则停止添加
+            result_length = _text_length(result_str)
+            if current_length + result_length > budget:
+                buf.write(f"... 还有 {len(results) - i} 个结果因长度限制未显示")
                 break
             
-            formatted_results.append(result_str)
-            current_length += len(result_str)
+            buf.write(result_str)
+            current_length += result_length
         
-        result_text = ''.join(formatted_results)
+        result_text = buf.getvalue()
         
         # 记录截断信息
-        self.logger.info(f"🔤 搜索结果格式化完成：原始 {len(results)} 个结果，返回内容长度 {len(result_text)} 字符")
+        self.logger.debug("🔤 搜索结果格式化完成：原始 %d 个结果，返回内容长度 %d 字符", len(results), len(result_text))
         
         return result_text
     
@@ -524,20 +1161,11 @@ class RelicSearchToolkit:
         if not text or len(text) <= max_length:
             return text
         
-        # 文物相关关键词
-        important_keywords = [
-            '文物', '古迹', '遗址', '博物馆', '历史', '文化', '收藏', '展品',
-            '朝代', '年代', '考古', '古代', '文献', '艺术', '传统', '保护',
-            '世界遗产', '国宝', '珍品', '古董', '典藏', '陶瓷', '青铜', '玉器'
-        ]
-        
-        # 按句号分句
-        sentences = text.split('。')
         result_sentences = []
         current_length = 0
         
-        # 优先选择包含关键词的句子
-        for sentence in sentences:
+        # 按句号逐句处理，优先选择包含关键词的句子，长度够了即停止
+        for sentence in _iter_sentences(text):
             if current_length >= max_length:
                 break
             
@@ -546,7 +1174,7 @@ class RelicSearchToolkit:
                 continue
                 
             # 检查句子是否包含重要关键词
-            has_keyword = any(keyword in sentence for keyword in important_keywords)
+            has_keyword = _KEYWORD_RE.search(sentence) is not None
             
             if has_keyword or len(result_sentences) == 0:  # 保证至少有一句
                 if current_length + len(sentence) <= max_length:
@@ -571,23 +1199,7 @@ class RelicSearchToolkit:
         Returns:
             缩短的URL
         """
-        if not url:
-            return ""
-        
-        # 提取域名
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-            domain = parsed.netloc
-            if domain:
-                return domain
-        except:
-            pass
-        
-        # 如果解析失败，简单截断
-        if len(url) > 50:
-            return url[:47] + "..."
-        return url
+        return _shorten_url(url)
     
     def _format_content_for_llm(self, content_result: Dict[str, Any], max_tokens: int = 2000) -> str:
         """
@@ -603,7 +1215,7 @@ class RelicSearchToolkit:
         if not content_result or 'error' in content_result:
             return f"网页内容提取失败：{content_result.get('error', '未知错误')}"
         
-        max_chars = max_tokens * 3
+        budget = _length_budget(max_tokens)
         title = content_result.get('title', '无标题')[:100]
         content = content_result.get('content', '无内容')
         url = content_result.get('url', '')
@@ -613,32 +1225,95 @@ class RelicSearchToolkit:
         result_str += f"来源：{url}\n"
         result_str += f"内容：\n"
         
-        # 计算内容可用的字符数
-        available_chars = max_chars - len(result_str)
+        # 计算内容可用的长度
+        available = budget - _text_length(result_str)
         
-        if len(content) > available_chars:
-            content = content[:available_chars] + "...[内容因长度限制被截断]"
+        truncated = _truncate_text(content, available)
+        if truncated is not None:
+            content = truncated + "...[内容因长度限制被截断]"
         
         result_str += content
         
         # 记录截断信息
-        self.logger.info(f"🔤 网页内容格式化完成：返回内容长度 {len(result_str)} 字符")
+        self.logger.debug("🔤 网页内容格式化完成：返回内容长度 %d 字符", len(result_str))
         
         return result_str
     
+    def _format_batch_search_results(self, queries: List[str],
+                                     results_list: List[List[Dict[str, Any]]]) -> str:
+        """格式化批量搜索结果，各查询平分token限制"""
+        max_tokens = max(self.token_limit // len(queries), 1)
+        return "\n\n".join(
+            f"查询：{query}\n{self._format_search_results_for_llm(results, max_tokens)}"
+            for query, results in zip(queries, results_list)
+        )
+    
+    def _format_batch_contents(self, contents: List[Dict[str, Any]], max_tokens: int = 2000) -> str:
+        """格式化批量网页内容，各网页平分token限制"""
+        per_page_tokens = max(max_tokens // len(contents), 1)
+        return "\n\n".join(self._format_content_for_llm(content, per_page_tokens) for content in contents)
+    
     def get_langchain_tools(self) -> List[Tool]:
         """获取LangChain工具列表"""
+        # 工具输入为JSON字符串列表时批量并发执行，否则按单个查询/URL处理
+        def search_relics_tool(tool_input: str) -> str:
+            queries = _parse_batch_input(tool_input)
+            if queries is None:
+                return self._format_search_results_for_llm(self.search_relics(tool_input))
+            return self._format_batch_search_results(queries, self.search_relics_many(queries))
+        
+        def extract_content_tool(tool_input: str) -> str:
+            urls = _parse_batch_input(tool_input)
+            if urls is None:
+                return self._format_content_for_llm(self.extract_page_content(tool_input))
+            return self._format_batch_contents(self.extract_page_content_many(urls))
+        
+        # 异步执行智能体时使用协程版本，共享事件循环上的aiohttp会话
+        async def search_relics_async(tool_input: str) -> str:
+            queries = _parse_batch_input(tool_input)
+            if queries is None:
+                return self._format_search_results_for_llm(await self.asearch_relics(tool_input))
+            return self._format_batch_search_results(queries, await self.asearch_relics_many(queries))
+        
+        async def extract_content_async(tool_input: str) -> str:
+            urls = _parse_batch_input(tool_input)
+            if urls is None:
+                return self._format_content_for_llm(await self.aextract_page_content(tool_input))
+            contents = await self.aextract_many(urls)
+            return self._format_batch_contents([
+                {'error': str(content)} if isinstance(content, BaseException) else content
+                for content in contents
+            ])
+        
         tools = [
             Tool(
                 name="search_relics",
-                description="搜索文物相关信息。输入：搜索查询字符串。输出：相关文物信息的搜索结果列表。",
-                func=lambda query: self._format_search_results_for_llm(self.search_relics(query))
+                description="搜索文物相关信息。输入：搜索查询字符串，或多个查询组成的JSON字符串列表（批量搜索）。输出：相关文物信息的搜索结果列表。",
+                func=search_relics_tool,
+                coroutine=search_relics_async
             ),
             Tool(
                 name="extract_content",
-                description="提取网页的详细内容。输入：网页URL。输出：网页的标题和主要内容。",
-                func=lambda url: self._format_content_for_llm(self.extract_page_content(url))
+                description="提取网页的详细内容。输入：网页URL，或多个URL组成的JSON字符串列表（批量提取）。输出：网页的标题和主要内容。",
+                func=extract_content_tool,
+                coroutine=extract_content_async
             )
         ]
         
         return tools
+    
+    def close(self):
+        """停止后台预取，关闭搜索工具和内容提取器持有的HTTP会话并清空结果缓存"""
+        for future in list(self._prefetch_futures.values()):
+            future.cancel()
+        self._prefetch_pool.shutdown(wait=False)
+        self._prefetch_futures.clear()
+        self.searxng.close()
+        self.extractor.close()
+        self._search_cache.clear()
+        self._extract_cache.clear()
+    
+    async def aclose(self):
+        """关闭当前事件循环上的异步HTTP会话"""
+        await self.searxng.aclose()
+        await self.extractor.aclose()
@@ -2,7 +2,21 @@
 RelicSeek Interface - 用户交互界面模块
 """
 
-from .streamlit_app import StreamlitInterface
-from .cli_app import CLIInterface
+import importlib
+
+# 界面类在首次访问时才导入，命令行工具启动时不必加载streamlit
+_LAZY_EXPORTS = {
+    "StreamlitInterface": ".streamlit_app",
+    "CLIInterface": ".cli_app",
+}
 
 __all__ = ["StreamlitInterface", "CLIInterface"]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
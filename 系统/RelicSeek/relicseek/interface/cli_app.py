@@ -2,20 +2,52 @@
 命令行界面
 """
 import click
-import json
 import sys
 import os
+import secrets
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
-from rich.console import Console
+from typing import Dict, Any, Optional, List, Callable, Tuple, Iterator, TYPE_CHECKING
+from rich.console import Console, Group
 from rich.table import Table
 from rich.panel import Panel
-from rich.markdown import Markdown
+from rich.text import Text
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.prompt import Prompt, Confirm
-import traceback
 
-from ..engine.core import RelicSeekEngine
+# 引擎、Markdown渲染和traceback只在用到的命令中导入，
+# 让--help和status等一次性命令启动更快
+if TYPE_CHECKING:
+    from ..engine.core import RelicSeekEngine
+
+
+# 导出文件的写缓冲区大小，大多数导出只需一次write系统调用
+_EXPORT_BUFFER_SIZE = 1 << 20
+
+# 验证结果各状态对应的图标和颜色
+_STATUS_ICON = {
+    'success': '✅',
+    'warning': '⚠️',
+    'error': '❌'
+}
+_STATUS_COLOR = {
+    'success': 'green',
+    'warning': 'yellow',
+    'error': 'red'
+}
+
+
+# 交互式搜索的输入历史文件
+_HISTORY_FILE = str(Path.home() / ".relicseek_history")
+_HISTORY_LENGTH = 1000
+
+
+@lru_cache(maxsize=None)
+def _status_cell(status: str) -> str:
+    """验证结果表格中的状态单元格（按状态缓存）"""
+    status_icon = _STATUS_ICON.get(status, '❓')
+    status_color = _STATUS_COLOR.get(status, 'white')
+    return f"[{status_color}]{status_icon} {status}[/{status_color}]"
 
 
 class CLIInterface:
@@ -24,32 +56,67 @@ class CLIInterface:
     def __init__(self):
         """初始化CLI界面"""
         self.console = Console()
-        self.engine: Optional[RelicSeekEngine] = None
+        self.engine: Optional["RelicSeekEngine"] = None
+        self._engine_config_dir: Optional[str] = None
         self.session_id = self._generate_session_id()
+        # 引擎状态和验证结果在两次搜索之间不会变化，按"代"缓存；
+        # 每次搜索或重新初始化引擎时代数加一，旧缓存随之失效
+        self._generation = 0
+        self._engine_info_cache: Dict[str, Tuple[int, Any]] = {}
+        # 各命令共用的进度显示，首次使用时创建
+        self._progress: Optional[Progress] = None
     
     def _generate_session_id(self) -> str:
-        """生成会话ID"""
-        import uuid
-        return str(uuid.uuid4())[:8]
+        """生成会话ID（8位十六进制）"""
+        return secrets.token_hex(4)
     
-    def initialize_engine(self, config_dir: Optional[str] = None) -> bool:
+    @contextmanager
+    def _progress_task(self, description: str) -> Iterator[Tuple[Progress, Any]]:
+        """
+        在共享的进度显示中执行一个任务
+        
+        进度显示只在任务执行期间刷新，任务之间停止，不影响交互式输入
+        """
+        if self._progress is None:
+            self._progress = Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                console=self.console
+            )
+        progress = self._progress
+        task = progress.add_task(description, total=None)
+        progress.start()
+        try:
+            yield progress, task
+        finally:
+            progress.stop()
+            progress.remove_task(task)
+    
+    def initialize_engine(self, config_dir: Optional[str] = None, verbose: bool = False) -> bool:
         """
         初始化引擎
         
         Args:
             config_dir: 配置文件目录
+            verbose: 初始化失败时是否输出完整的错误堆栈
             
         Returns:
             是否初始化成功
         """
+        # 同一配置目录的引擎已初始化时直接复用
+        if self.engine is not None and self._engine_config_dir == config_dir:
+            return True
+        
         try:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=self.console
-            ) as progress:
-                task = progress.add_task("正在初始化RelicSeek引擎...", total=None)
-                self.engine = RelicSeekEngine(config_dir)
+            from ..engine.core import RelicSeekEngine
+            
+            with self._progress_task("正在初始化RelicSeek引擎...") as (progress, task):
+                engine = RelicSeekEngine(config_dir)
+                if self.engine is not None:
+                    self.engine.close()
+                self.engine = engine
+                self._engine_config_dir = config_dir
+                self._generation += 1
                 progress.update(task, description="引擎初始化完成!")
             
             self.console.print("✅ [green]引擎初始化成功![/green]")
@@ -57,9 +124,49 @@ class CLIInterface:
             
         except Exception as e:
             self.console.print(f"❌ [red]引擎初始化失败: {str(e)}[/red]")
-            self.console.print(f"[dim]详细错误: {traceback.format_exc()}[/dim]")
+            if verbose:
+                import traceback
+                self.console.print(f"[dim]详细错误: {traceback.format_exc()}[/dim]")
+            else:
+                self.console.print("[dim]使用 --verbose 查看详细错误[/dim]")
             return False
     
+    def close(self):
+        """释放引擎持有的智能体、HTTP会话和日志资源"""
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+            self._engine_config_dir = None
+    
+    def _ask(self, prompt: str) -> str:
+        """显示提示并读取一行输入（直接使用Console.input，不经过Prompt的校验循环）"""
+        return self.console.input(prompt + ": ")
+    
+    def _confirm(self, prompt: str, default: bool = False) -> bool:
+        """询问是/否，直接回车时返回默认值"""
+        answer = self.console.input(f"{prompt} [bold magenta]\\[y/n][/bold magenta] "
+                                    f"[bold cyan]({'y' if default else 'n'})[/bold cyan]: ")
+        answer = answer.strip().lower()
+        if not answer:
+            return default
+        if default:
+            return answer not in ('n', 'no')
+        return answer in ('y', 'yes')
+    
+    def _load_history(self):
+        """启用readline行编辑并载入历史输入，返回readline模块（不可用时为None）"""
+        try:
+            import readline
+        except ImportError:  # Windows等平台没有readline
+            return None
+        
+        readline.set_history_length(_HISTORY_LENGTH)
+        try:
+            readline.read_history_file(_HISTORY_FILE)
+        except OSError:
+            pass
+        return readline
+    
     def search_interactive(self):
         """交互式搜索模式"""
         self.console.print(Panel.fit(
@@ -72,12 +179,24 @@ class CLIInterface:
             self.console.print("❌ [red]引擎未初始化，请先运行初始化命令[/red]")
             return
         
+        readline = self._load_history()
+        try:
+            self._search_loop()
+        finally:
+            if readline is not None:
+                try:
+                    readline.write_history_file(_HISTORY_FILE)
+                except OSError:
+                    pass
+    
+    def _search_loop(self):
+        """交互式搜索的输入循环"""
         search_count = 0
         
         while True:
             try:
                 # 获取用户输入
-                query = Prompt.ask("\n[bold cyan]🔍 请输入您要搜索的文物信息[/bold cyan]")
+                query = self._ask("\n[bold cyan]🔍 请输入您要搜索的文物信息[/bold cyan]")
                 
                 if query.lower() in ['exit', 'quit', '退出']:
                     self.console.print("👋 [yellow]再见![/yellow]")
@@ -96,10 +215,10 @@ class CLIInterface:
                     self.display_search_result(result, search_count)
                     
                     # 询问是否继续
-                    if not Confirm.ask("\n[dim]是否继续搜索?[/dim]", default=True):
+                    if not self._confirm("\n[dim]是否继续搜索?[/dim]", default=True):
                         break
                 
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 self.console.print("\n👋 [yellow]搜索被中断，再见![/yellow]")
                 break
             except Exception as e:
@@ -120,14 +239,11 @@ class CLIInterface:
             self.console.print("❌ [red]引擎未初始化[/red]")
             return None
         
+        self._generation += 1
+        
         try:
             if show_progress:
-                with Progress(
-                    SpinnerColumn(),
-                    TextColumn("[progress.description]{task.description}"),
-                    console=self.console
-                ) as progress:
-                    task = progress.add_task("🤖 智能体正在搜索中...", total=None)
+                with self._progress_task("🤖 智能体正在搜索中...") as (progress, task):
                     result = self.engine.search(query, session_id=self.session_id)
                     progress.update(task, description="搜索完成!")
             else:
@@ -139,7 +255,33 @@ class CLIInterface:
             self.console.print(f"❌ [red]搜索失败: {str(e)}[/red]")
             return None
     
-    def display_search_result(self, result: Dict[str, Any], search_number: int = 1):
+    def _memoized(self, name: str, compute: Callable[[], Any]) -> Any:
+        """在当前代内复用引擎查询的结果"""
+        cached = self._engine_info_cache.get(name)
+        if cached is not None and cached[0] == self._generation:
+            return cached[1]
+        
+        value = compute()
+        self._engine_info_cache[name] = (self._generation, value)
+        return value
+    
+    def get_engine_status(self) -> Dict[str, Any]:
+        """获取引擎状态（同一代内只查询一次）"""
+        return self._memoized('status', self.engine.get_engine_status)
+    
+    def get_config_json(self) -> str:
+        """获取缩进格式的配置信息JSON（同一代内只序列化一次）"""
+        from ..config.serialization import json_dumps
+        
+        return self._memoized(
+            'config_json', lambda: json_dumps(self.get_engine_status().get('config', {}), indent=True)
+        )
+    
+    def get_validation_result(self) -> Dict[str, Any]:
+        """获取系统验证结果（同一代内只验证一次）"""
+        return self._memoized('validation', self.engine.validate_setup)
+    
+    def display_search_result(self, result: Dict[str, Any], search_number: int = 1) -> None:
         """
         显示搜索结果
         
@@ -147,11 +289,14 @@ class CLIInterface:
             result: 搜索结果
             search_number: 搜索序号
         """
-        self.console.print("\n" + "="*80)
+        from rich.markdown import Markdown
+        
+        # 各部分先收集起来，在需要用户交互前一次性输出
+        parts: List[Any] = ["\n" + "="*80]
         
         # 结果概览
         if result.get('success', False):
-            self.console.print(f"✅ [green]搜索 #{search_number} 成功![/green]")
+            parts.append(f"✅ [green]搜索 #{search_number} 成功![/green]")
             
             # 基本信息表格
             table = Table(title="搜索结果概览", border_style="green")
@@ -162,39 +307,44 @@ class CLIInterface:
             table.add_row("查询", result.get('query', 'N/A'))
             
             # 质量信息
-            results_data = result.get('results', {})
-            quality_score = results_data.get('quality_score', 0)
-            confidence = results_data.get('confidence', 'unknown')
+            results_data: Dict[str, Any] = result.get('results', {})
+            quality_score: float = results_data.get('quality_score', 0)
+            confidence: str = results_data.get('confidence', 'unknown')
             
             table.add_row("质量评分", f"{quality_score:.1f}/5.0")
             table.add_row("置信度", confidence)
             
-            self.console.print(table)
+            parts.append(table)
             
             # 显示最终报告
             if 'report' in result and result['report']:
-                self.console.print("\n📄 [bold]文物信息报告:[/bold]")
-                self.console.print(Panel(
+                parts.append("\n📄 [bold]文物信息报告:[/bold]")
+                parts.append(Panel(
                     Markdown(result['report']),
                     border_style="green",
                     title="📋 详细报告"
                 ))
             
+            self.console.print(Group(*parts))
+            
             # 显示搜索过程
-            if Confirm.ask("\n[dim]是否查看详细搜索过程?[/dim]", default=False):
+            if self._confirm("\n[dim]是否查看详细搜索过程?[/dim]", default=False):
                 self.display_search_process(result)
             
         else:
-            self.console.print(f"❌ [red]搜索 #{search_number} 失败![/red]")
+            parts.append(f"❌ [red]搜索 #{search_number} 失败![/red]")
             error_msg = result.get('error', '未知错误')
-            self.console.print(f"[red]错误信息: {error_msg}[/red]")
+            parts.append(f"[red]错误信息: {error_msg}[/red]")
+            self.console.print(Group(*parts))
     
-    def display_search_process(self, result: Dict[str, Any]):
+    def display_search_process(self, result: Dict[str, Any]) -> None:
         """显示详细搜索过程"""
+        # 各部分先收集起来，最后一次性输出
+        parts: List[Any] = []
         
         # 查询分析
         if 'analysis' in result:
-            self.console.print("\n🧠 [bold]查询分析:[/bold]")
+            parts.append("\n🧠 [bold]查询分析:[/bold]")
             analysis = result['analysis']
             if isinstance(analysis, dict):
                 analysis_table = Table(border_style="blue")
@@ -204,62 +354,59 @@ class CLIInterface:
                 analysis_table.add_row("复杂度", str(analysis.get('complexity', 'N/A')))
                 analysis_table.add_row("查询类型", str(analysis.get('query_type', 'N/A')))
                 
-                entities = analysis.get('entities', [])
+                entities: List[str] = analysis.get('entities', [])
                 if entities:
                     analysis_table.add_row("关键实体", ", ".join(entities))
                 
-                self.console.print(analysis_table)
+                parts.append(analysis_table)
         
         # 搜索策略
         if 'strategy' in result:
-            self.console.print("\n📋 [bold]搜索策略:[/bold]")
+            parts.append("\n📋 [bold]搜索策略:[/bold]")
             strategy = result['strategy']
             if isinstance(strategy, dict):
-                keywords = strategy.get('keywords', [])
+                keywords: List[str] = strategy.get('keywords', [])
                 if keywords:
-                    self.console.print(f"🔑 关键词: {', '.join(keywords)}")
+                    parts.append(f"🔑 关键词: {', '.join(keywords)}")
                 
-                steps = strategy.get('search_steps', [])
+                steps: List[str] = strategy.get('search_steps', [])
                 if steps:
-                    self.console.print("📝 搜索步骤:")
-                    for i, step in enumerate(steps, 1):
-                        self.console.print(f"  {i}. {step}")
+                    parts.append("📝 搜索步骤:")
+                    # 所有步骤合并为一个纯文本块，步骤内容不按markup解析
+                    parts.append(Text("\n".join(f"  {i}. {step}" for i, step in enumerate(steps, 1))))
         
         # 质量分析
-        results_data = result.get('results', {})
+        results_data: Dict[str, Any] = result.get('results', {})
         if 'reflection' in results_data:
-            self.console.print("\n🤔 [bold]系统反思:[/bold]")
-            self.console.print(Panel(
+            parts.append("\n🤔 [bold]系统反思:[/bold]")
+            parts.append(Panel(
                 results_data['reflection'],
                 border_style="yellow",
                 title="反思内容"
             ))
         
         # 改进建议
-        recommendations = results_data.get('recommendations', [])
+        recommendations: List[str] = results_data.get('recommendations', [])
         if recommendations:
-            self.console.print("\n💡 [bold]改进建议:[/bold]")
-            for rec in recommendations:
-                self.console.print(f"  • {rec}")
+            parts.append("\n💡 [bold]改进建议:[/bold]")
+            parts.append(Text("\n".join(f"  • {rec}" for rec in recommendations)))
+        
+        if parts:
+            self.console.print(Group(*parts))
     
-    def validate_system(self):
+    def validate_system(self) -> None:
         """验证系统设置"""
         if not self.engine:
             self.console.print("❌ [red]引擎未初始化[/red]")
             return
         
         try:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=self.console
-            ) as progress:
-                task = progress.add_task("正在验证系统设置...", total=None)
-                validation_result = self.engine.validate_setup()
+            with self._progress_task("正在验证系统设置..."):
+                validation_result: Dict[str, Any] = self.get_validation_result()
             
             self.console.print("\n🔍 [bold]系统验证结果:[/bold]")
             
-            overall_status = validation_result['overall_status']
+            overall_status: str = validation_result['overall_status']
             if overall_status == 'success':
                 self.console.print("✅ [green]系统配置验证通过![/green]")
             elif overall_status == 'warning':
@@ -274,25 +421,10 @@ class CLIInterface:
             table.add_column("说明", style="white")
             
             for check_name, check_result in validation_result['checks'].items():
-                status = check_result['status']
-                message = check_result['message']
-                
-                status_icon = {
-                    'success': '✅',
-                    'warning': '⚠️',
-                    'error': '❌'
-                }.get(status, '❓')
-                
-                status_color = {
-                    'success': 'green',
-                    'warning': 'yellow',
-                    'error': 'red'
-                }.get(status, 'white')
-                
                 table.add_row(
                     check_name,
-                    f"[{status_color}]{status_icon} {status}[/{status_color}]",
-                    message
+                    _status_cell(check_result['status']),
+                    check_result['message']
                 )
             
             self.console.print(table)
@@ -307,7 +439,7 @@ class CLIInterface:
             return
         
         try:
-            status = self.engine.get_engine_status()
+            status = self.get_engine_status()
             
             self.console.print("\n📊 [bold]引擎状态信息:[/bold]")
             
@@ -329,11 +461,10 @@ class CLIInterface:
             self.console.print(status_table)
             
             # 配置信息
-            if Confirm.ask("\n[dim]是否查看详细配置信息?[/dim]", default=False):
-                config_info = status.get('config', {})
+            if self._confirm("\n[dim]是否查看详细配置信息?[/dim]", default=False):
                 self.console.print("\n⚙️ [bold]配置信息:[/bold]")
                 self.console.print(Panel(
-                    json.dumps(config_info, indent=2, ensure_ascii=False),
+                    self.get_config_json(),
                     title="配置详情",
                     border_style="blue"
                 ))
@@ -341,38 +472,43 @@ class CLIInterface:
         except Exception as e:
             self.console.print(f"❌ [red]获取状态信息失败: {str(e)}[/red]")
     
-    def export_results(self, output_file: str, search_results: list):
+    def export_results(self, output_file: str, search_results: list, compact: bool = False):
         """
         导出搜索结果
         
         Args:
             output_file: 输出文件路径
             search_results: 搜索结果列表
+            compact: JSON格式时是否不缩进（供程序读取）
         """
         try:
             output_path = Path(output_file)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
             if output_path.suffix.lower() == '.json':
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(search_results, f, ensure_ascii=False, indent=2)
+                from ..config.serialization import json_dumps_bytes
+                
+                # 直接写入UTF-8字节，省去文本层的逐块编码
+                with open(output_path, 'wb') as f:
+                    f.write(json_dumps_bytes(search_results, indent=not compact))
             else:
-                # 导出为文本格式
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write("RelicSeek 搜索结果导出\n")
-                    f.write("=" * 50 + "\n\n")
+                # 导出为文本格式，先收集整个文档的片段，再经1MB缓冲区批量写入
+                parts = ["RelicSeek 搜索结果导出\n", "=" * 50 + "\n\n"]
+                
+                for i, result in enumerate(search_results, 1):
+                    parts.append(f"搜索 #{i}\n")
+                    parts.append(f"查询: {result.get('query', 'N/A')}\n")
+                    parts.append(f"搜索ID: {result.get('search_id', 'N/A')}\n")
+                    parts.append(f"状态: {'成功' if result.get('success') else '失败'}\n")
+                    
+                    if result.get('report'):
+                        parts.append("\n报告:\n")
+                        parts.append(result['report'])
                     
-                    for i, result in enumerate(search_results, 1):
-                        f.write(f"搜索 #{i}\n")
-                        f.write(f"查询: {result.get('query', 'N/A')}\n")
-                        f.write(f"搜索ID: {result.get('search_id', 'N/A')}\n")
-                        f.write(f"状态: {'成功' if result.get('success') else '失败'}\n")
-                        
-                        if result.get('report'):
-                            f.write("\n报告:\n")
-                            f.write(result['report'])
-                        
-                        f.write("\n" + "-" * 50 + "\n\n")
+                    parts.append("\n" + "-" * 50 + "\n\n")
+                
+                with open(output_path, 'w', encoding='utf-8', buffering=_EXPORT_BUFFER_SIZE) as f:
+                    f.writelines(parts)
             
             self.console.print(f"✅ [green]结果已导出到: {output_path}[/green]")
             
@@ -383,12 +519,16 @@ class CLIInterface:
 # Click命令行接口
 @click.group()
 @click.option('--config-dir', '-c', help='配置文件目录路径')
+@click.option('--verbose', '-v', is_flag=True, help='出错时显示详细错误信息')
 @click.pass_context
-def cli(ctx, config_dir):
+def cli(ctx, config_dir, verbose):
     """RelicSeek 文物搜索智能体命令行工具"""
     ctx.ensure_object(dict)
     ctx.obj['config_dir'] = config_dir
-    ctx.obj['interface'] = CLIInterface()
+    ctx.obj['verbose'] = verbose
+    ctx.obj['interface'] = interface = CLIInterface()
+    # 命令结束时释放引擎资源
+    ctx.call_on_close(interface.close)
 
 
 @cli.command()
@@ -398,20 +538,21 @@ def init(ctx):
     interface = ctx.obj['interface']
     config_dir = ctx.obj['config_dir']
     
-    interface.initialize_engine(config_dir)
+    interface.initialize_engine(config_dir, ctx.obj['verbose'])
 
 
 @cli.command()
 @click.option('--query', '-q', help='搜索查询（非交互模式）')
 @click.option('--output', '-o', help='输出文件路径')
+@click.option('--compact', is_flag=True, help='导出JSON时不缩进')
 @click.pass_context
-def search(ctx, query, output):
+def search(ctx, query, output, compact):
     """执行文物搜索"""
     interface = ctx.obj['interface']
     config_dir = ctx.obj['config_dir']
     
     # 初始化引擎
-    if not interface.initialize_engine(config_dir):
+    if not interface.initialize_engine(config_dir, ctx.obj['verbose']):
         return
     
     if query:
@@ -421,7 +562,7 @@ def search(ctx, query, output):
             interface.display_search_result(result)
             
             if output:
-                interface.export_results(output, [result])
+                interface.export_results(output, [result], compact=compact)
     else:
         # 交互模式
         interface.search_interactive()
@@ -434,7 +575,7 @@ def validate(ctx):
     interface = ctx.obj['interface']
     config_dir = ctx.obj['config_dir']
     
-    if interface.initialize_engine(config_dir):
+    if interface.initialize_engine(config_dir, ctx.obj['verbose']):
         interface.validate_system()
 
 
@@ -445,7 +586,7 @@ def status(ctx):
     interface = ctx.obj['interface']
     config_dir = ctx.obj['config_dir']
     
-    if interface.initialize_engine(config_dir):
+    if interface.initialize_engine(config_dir, ctx.obj['verbose']):
         interface.show_engine_status()
 
 
@@ -458,16 +599,15 @@ def config(ctx, output_format):
     interface = ctx.obj['interface']
     config_dir = ctx.obj['config_dir']
     
-    if interface.initialize_engine(config_dir):
-        status = interface.engine.get_engine_status()
-        config_info = status.get('config', {})
+    if interface.initialize_engine(config_dir, ctx.obj['verbose']):
+        config_json = interface.get_config_json()
         
         if output_format == 'json':
-            interface.console.print(json.dumps(config_info, indent=2, ensure_ascii=False))
+            interface.console.print(config_json)
         else:
             interface.console.print("⚙️ [bold]当前配置:[/bold]")
             interface.console.print(Panel(
-                json.dumps(config_info, indent=2, ensure_ascii=False),
+                config_json,
                 title="配置信息",
                 border_style="blue"
             ))
@@ -1,14 +1,148 @@
 """
 Streamlit Web界面
 """
+import re
+import uuid
 import streamlit as st
-import json
-import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, Optional
-import traceback
+from itertools import islice
+from typing import Dict, Any, Optional, TYPE_CHECKING
 
-from ..engine.core import RelicSeekEngine
+# 引擎依赖langchain等重量级模块，在首次初始化时才导入，
+# 欢迎页无需等待，修改界面代码后的热重载也更快
+if TYPE_CHECKING:
+    from ..engine.core import RelicSeekEngine
+
+
+# 每个会话保留的搜索记录数，更早的记录及其完整结果会被丢弃
+_HISTORY_SIZE = 50
+
+# 页面自定义样式，导入时压缩空白，减少每次重跑发送给浏览器的数据量
+_CSS = re.sub(r'\s*([{};:,])\s*', r'\1', re.sub(r'\s+', ' ', """
+<style>
+.main-header {
+    text-align: center;
+    color: #8B4513;
+    font-size: 2.5rem;
+    font-weight: bold;
+    margin-bottom: 2rem;
+    text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
+}
+.search-container {
+    background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
+    padding: 2rem;
+    border-radius: 10px;
+    margin-bottom: 2rem;
+    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+}
+.result-container {
+    background: white;
+    padding: 1.5rem;
+    border-radius: 10px;
+    border-left: 4px solid #8B4513;
+    margin-bottom: 1rem;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+.sidebar-header {
+    color: #8B4513;
+    font-weight: bold;
+    font-size: 1.2rem;
+    margin-bottom: 1rem;
+}
+.status-success {
+    color: #28a745;
+    font-weight: bold;
+}
+.status-error {
+    color: #dc3545;
+    font-weight: bold;
+}
+.status-warning {
+    color: #ffc107;
+    font-weight: bold;
+}
+.search-stats {
+    background: #f8f9fa;
+    padding: 1rem;
+    border-radius: 5px;
+    border: 1px solid #dee2e6;
+    margin: 1rem 0;
+}
+.artifact-info {
+    background: #fff8e1;
+    padding: 1rem;
+    border-radius: 5px;
+    border-left: 3px solid #ffc107;
+    margin: 1rem 0;
+}
+</style>
+""")).strip()
+
+# st.fragment（1.37+，1.33起为experimental_fragment）标记的函数内发生交互时只重跑该函数；
+# 旧版本Streamlit没有片段，退化为普通函数
+_st_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+_fragment = _st_fragment or (lambda func: func)
+
+
+def _rerun_app(message: Optional[str] = None):
+    """
+    侧边栏修改了主界面依赖的状态后刷新主界面，并显示操作结果提示
+    
+    侧边栏先于主界面渲染，没有片段时本次执行随后就会按新状态渲染主界面，无需重跑，
+    提示直接显示；侧边栏作为片段单独重跑时才需要重跑整个应用，提示暂存在会话状态中，
+    重跑后由_show_flash显示
+    """
+    if _st_fragment is not None:
+        if message:
+            st.session_state._flash_message = message
+        st.rerun()
+    elif message:
+        st.success(message)
+
+
+def _show_flash():
+    """显示重跑前暂存的操作结果提示（只显示一次）"""
+    message = st.session_state.pop('_flash_message', None)
+    if message:
+        st.success(message)
+
+
+def _show_traceback(exc: BaseException, label: str = "查看详细错误信息"):
+    """在默认折叠的面板中以纯文本显示异常堆栈，不做代码高亮"""
+    # 只在出错时才需要traceback模块
+    import traceback
+    with st.expander(label, expanded=False):
+        st.text("".join(traceback.TracebackException.from_exception(exc).format()))
+
+
+@st.cache_resource(show_spinner=False)
+def _get_engine() -> "RelicSeekEngine":
+    """获取进程内共享的引擎，首次调用时构建，之后各会话和页面直接复用"""
+    from ..engine.core import RelicSeekEngine
+    return RelicSeekEngine()
+
+
+# 侧边栏每次交互都会重新执行，引擎状态和系统验证结果短时缓存；
+# 以引擎的id作为缓存键，带下划线的_engine参数不参与哈希
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_status(engine_id: int, _engine: "RelicSeekEngine") -> Dict[str, Any]:
+    """获取引擎状态（缓存30秒）"""
+    return _engine.get_engine_status()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _result_json(search_id: str, _result: Dict[str, Any]) -> str:
+    """把搜索结果序列化为缩进的JSON字符串（按搜索ID缓存）"""
+    from ..config.serialization import json_dumps
+    # 中间步骤等对象无法直接序列化，与st.json一样转为repr
+    return json_dumps(_result, indent=True, default=repr)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_validation(engine_id: int, _engine: "RelicSeekEngine") -> Dict[str, Any]:
+    """验证系统设置（缓存5分钟）"""
+    return _engine.validate_setup()
 
 
 class StreamlitInterface:
@@ -28,79 +162,52 @@ class StreamlitInterface:
             initial_sidebar_state="expanded"
         )
         
-        # 添加自定义CSS
-        st.markdown("""
-        <style>
-        .main-header {
-            text-align: center;
-            color: #8B4513;
-            font-size: 2.5rem;
-            font-weight: bold;
-            margin-bottom: 2rem;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-        }
-        .search-container {
-            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-            padding: 2rem;
-            border-radius: 10px;
-            margin-bottom: 2rem;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }
-        .result-container {
-            background: white;
-            padding: 1.5rem;
-            border-radius: 10px;
-            border-left: 4px solid #8B4513;
-            margin-bottom: 1rem;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }
-        .sidebar-header {
-            color: #8B4513;
-            font-weight: bold;
-            font-size: 1.2rem;
-            margin-bottom: 1rem;
-        }
-        .status-success {
-            color: #28a745;
-            font-weight: bold;
-        }
-        .status-error {
-            color: #dc3545;
-            font-weight: bold;
-        }
-        .status-warning {
-            color: #ffc107;
-            font-weight: bold;
-        }
-        .search-stats {
-            background: #f8f9fa;
-            padding: 1rem;
-            border-radius: 5px;
-            border: 1px solid #dee2e6;
-            margin: 1rem 0;
-        }
-        .artifact-info {
-            background: #fff8e1;
-            padding: 1rem;
-            border-radius: 5px;
-            border-left: 3px solid #ffc107;
-            margin: 1rem 0;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        # 添加自定义CSS（每次重跑都需要重新输出，否则样式会从页面上移除）
+        st.markdown(_CSS, unsafe_allow_html=True)
     
     def initialize_session_state(self):
         """初始化会话状态"""
         if 'engine' not in st.session_state:
             st.session_state.engine = None
-        if 'search_history' not in st.session_state:
-            st.session_state.search_history = []
+        if 'result_store' not in st.session_state:
+            self._reset_history()
         if 'session_id' not in st.session_state:
-            import uuid
             st.session_state.session_id = str(uuid.uuid4())
         if 'engine_initialized' not in st.session_state:
             st.session_state.engine_initialized = False
     
+    def _reset_history(self):
+        """
+        重置搜索历史
+        
+        search_history只保存轻量的搜索记录，完整结果按搜索ID存放在result_store中，
+        侧边栏遍历历史时不必触及大块的结果数据
+        """
+        st.session_state.search_history = deque(maxlen=_HISTORY_SIZE)
+        st.session_state.result_store = {}
+        st.session_state.search_count = 0
+    
+    def _record_search(self, query: str, result: Dict[str, Any]):
+        """保存一次搜索的记录和完整结果"""
+        history = st.session_state.search_history
+        result_store = st.session_state.result_store
+        
+        # 历史已满时，最早的记录将被挤出，同时释放其结果
+        if len(history) == history.maxlen:
+            evicted = history[0]['search_id']
+            if not any(record['search_id'] == evicted for record in islice(history, 1, None)):
+                result_store.pop(evicted, None)
+        
+        search_id = result.get('search_id', '')
+        history.append({
+            'query': query,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'success': result.get('success', False),
+            'search_id': search_id
+        })
+        result_store[search_id] = result
+        st.session_state.search_count += 1
+    
     def run(self):
         """运行Streamlit应用"""
         # 页面标题
@@ -117,56 +224,76 @@ class StreamlitInterface:
     
     def render_sidebar(self):
         """渲染侧边栏"""
+        # 片段不能直接以侧边栏为根，在侧边栏容器中调用片段函数
         with st.sidebar:
-            st.markdown('<div class="sidebar-header">🔧 系统控制</div>', unsafe_allow_html=True)
-            
-            # 引擎初始化
-            if st.button("🚀 初始化引擎", use_container_width=True):
-                self.initialize_engine()
-            
-            # 系统状态
-            if st.session_state.engine:
-                status = st.session_state.engine.get_engine_status()
-                st.markdown("**📊 系统状态**")
-                if status['initialized']:
-                    st.markdown('<span class="status-success">✅ 引擎运行正常</span>', unsafe_allow_html=True)
-                else:
-                    st.markdown('<span class="status-error">❌ 引擎未初始化</span>', unsafe_allow_html=True)
-            
-            st.markdown("---")
-            
-            # 配置信息
-            st.markdown('<div class="sidebar-header">⚙️ 配置信息</div>', unsafe_allow_html=True)
-            
-            if st.button("🔍 验证系统设置", use_container_width=True):
-                self.validate_system_setup()
-            
-            if st.button("🔄 重新加载配置", use_container_width=True):
-                self.reload_config()
-            
-            st.markdown("---")
-            
-            # 会话管理
-            st.markdown('<div class="sidebar-header">💬 会话管理</div>', unsafe_allow_html=True)
-            
-            if st.button("🗑️ 清除会话", use_container_width=True):
-                self.clear_session()
-            
-            # 显示会话信息
-            st.markdown(f"**会话ID:** `{st.session_state.session_id[:8]}...`")
-            st.markdown(f"**搜索次数:** {len(st.session_state.search_history)}")
-            
-            st.markdown("---")
-            
-            # 搜索历史
-            if st.session_state.search_history:
-                st.markdown('<div class="sidebar-header">📚 搜索历史</div>', unsafe_allow_html=True)
-                for i, search in enumerate(reversed(st.session_state.search_history[-5:])):
-                    with st.expander(f"🔍 {search['query'][:20]}..."):
-                        st.markdown(f"**时间:** {search['timestamp']}")
-                        st.markdown(f"**状态:** {'✅ 成功' if search['success'] else '❌ 失败'}")
-                        if search['success']:
-                            st.markdown(f"**搜索ID:** `{search['search_id']}`")
+            self._render_sidebar_body()
+    
+    @_fragment
+    def _render_sidebar_body(self):
+        """侧边栏内容；验证、重新加载配置等侧边栏内的交互只重跑这一部分"""
+        st.markdown('<div class="sidebar-header">🔧 系统控制</div>', unsafe_allow_html=True)
+        _show_flash()
+        
+        # 引擎初始化
+        if st.button("🚀 初始化引擎", use_container_width=True):
+            self.initialize_engine()
+        
+        # 系统状态
+        if st.session_state.engine:
+            engine = st.session_state.engine
+            status = _cached_status(id(engine), engine)
+            st.markdown("**📊 系统状态**")
+            if status['initialized']:
+                st.markdown('<span class="status-success">✅ 引擎运行正常</span>', unsafe_allow_html=True)
+            else:
+                st.markdown('<span class="status-error">❌ 引擎未初始化</span>', unsafe_allow_html=True)
+        
+        st.markdown("---")
+        
+        # 配置信息
+        st.markdown('<div class="sidebar-header">⚙️ 配置信息</div>', unsafe_allow_html=True)
+        
+        if st.button("🔍 验证系统设置", use_container_width=True):
+            self.validate_system_setup()
+        
+        if st.button("🔄 重新加载配置", use_container_width=True):
+            self.reload_config()
+        
+        st.markdown("---")
+        
+        # 会话管理
+        st.markdown('<div class="sidebar-header">💬 会话管理</div>', unsafe_allow_html=True)
+        
+        if st.button("🗑️ 清除会话", use_container_width=True):
+            self.clear_session()
+        
+        # 显示会话信息
+        st.markdown(f"**会话ID:** `{st.session_state.session_id[:8]}...`")
+        st.markdown(f"**搜索次数:** {st.session_state.search_count}")
+        
+        st.markdown("---")
+        
+        # 搜索历史
+        if st.session_state.search_history:
+            # 只用一个折叠面板，最近一次搜索给出详情，其余每条压缩为一行，合并为一次markdown输出
+            with st.expander("📚 搜索历史", expanded=False):
+                recent = list(islice(reversed(st.session_state.search_history), 5))
+                latest = recent[0]
+                lines = [
+                    f"**🔍 {latest['query'][:20]}...**",
+                    f"- **时间:** {latest['timestamp']}",
+                    f"- **状态:** {'✅ 成功' if latest['success'] else '❌ 失败'}",
+                ]
+                if latest['success']:
+                    lines.append(f"- **搜索ID:** `{latest['search_id']}`")
+                if len(recent) > 1:
+                    lines.append("")
+                    lines.append("**更早的搜索:**")
+                    lines.extend(
+                        f"- {'✅' if search['success'] else '❌'} {search['query'][:20]}... ({search['timestamp']})"
+                        for search in recent[1:]
+                    )
+                st.markdown("\n".join(lines))
     
     def render_initialization_interface(self):
         """渲染初始化界面"""
@@ -254,41 +381,29 @@ class StreamlitInterface:
             st.error("❌ 引擎未初始化，请先初始化引擎")
             return
         
-        # 显示搜索进度
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        # 搜索进度显示在一个状态容器中，只在阶段变化时更新
+        status = st.status("🔍 正在分析查询...", expanded=False)
         
         try:
-            # 开始搜索
-            status_text.text("🔍 正在分析查询...")
-            progress_bar.progress(20)
-            
-            # 执行搜索
-            with st.spinner("🤖 智能体正在搜索中..."):
+            # 执行搜索，同义查询直接复用本会话缓存的结果
+            semantic_cache = self._get_semantic_cache()
+            result = semantic_cache.get(query)
+            if result is None:
+                status.update(label="🤖 智能体正在搜索中...")
                 result = st.session_state.engine.search(
                     query=query,
-                    session_id=st.session_state.session_id
+                    session_id=st.session_state.session_id,
+                    memory=self._get_agent_memory()
                 )
-            
-            progress_bar.progress(80)
-            status_text.text("📊 正在处理结果...")
+                if result.get('success', False):
+                    semantic_cache.set(query, result)
+            else:
+                status.write("♻️ 已复用相似查询的搜索结果")
             
             # 保存搜索记录
-            search_record = {
-                'query': query,
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'success': result.get('success', False),
-                'search_id': result.get('search_id', ''),
-                'result': result
-            }
-            st.session_state.search_history.append(search_record)
+            self._record_search(query, result)
             
-            progress_bar.progress(100)
-            status_text.text("✅ 搜索完成!")
-            
-            time.sleep(1)
-            progress_bar.empty()
-            status_text.empty()
+            status.update(label="✅ 搜索完成!", state="complete")
             
             # 显示结果
             if result.get('success', False):
@@ -297,11 +412,33 @@ class StreamlitInterface:
                 st.error(f"❌ 搜索失败: {result.get('error', '未知错误')}")
                 
         except Exception as e:
-            progress_bar.empty()
-            status_text.empty()
+            status.update(label="❌ 搜索出错", state="error")
             st.error(f"❌ 搜索过程中出现错误: {str(e)}")
-            st.error("详细错误信息:")
-            st.code(traceback.format_exc())
+            _show_traceback(e)
+    
+    def _get_semantic_cache(self):
+        """获取当前会话的语义查询缓存，首次使用时创建"""
+        from ..engine.semantic_cache import SemanticCache, load_embedding_model
+        cache = st.session_state.get('semantic_cache')
+        if cache is None:
+            cache = SemanticCache(model=load_embedding_model())
+            st.session_state.semantic_cache = cache
+        elif cache.model is None:
+            # 句向量模型此前加载失败时，过了重试等待期再补上
+            cache.model = load_embedding_model()
+        return cache
+    
+    def _get_agent_memory(self):
+        """
+        获取当前会话的对话记忆，首次使用时创建
+        
+        引擎在所有会话间共用，对话记忆保存在各自的会话状态中，不会混入其他用户的对话
+        """
+        memory = st.session_state.get('agent_memory')
+        if memory is None:
+            memory = st.session_state.engine.create_session_memory()
+            st.session_state.agent_memory = memory
+        return memory
     
     def render_search_results(self):
         """渲染搜索结果"""
@@ -310,7 +447,7 @@ class StreamlitInterface:
         
         # 获取最新搜索结果
         latest_search = st.session_state.search_history[-1]
-        result = latest_search['result']
+        result = st.session_state.result_store.get(latest_search['search_id'], {})
         
         if not result.get('success', False):
             return
@@ -318,18 +455,16 @@ class StreamlitInterface:
         st.markdown("---")
         st.markdown("### 📋 搜索结果")
         
-        # 结果概览
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("搜索状态", "✅ 成功" if result.get('success') else "❌ 失败")
-        with col2:
-            st.metric("搜索ID", result.get('search_id', 'N/A'))
-        with col3:
-            quality_score = result.get('results', {}).get('quality_score', 0)
-            st.metric("质量评分", f"{quality_score:.1f}/5.0")
-        with col4:
-            confidence = result.get('results', {}).get('confidence', 'unknown')
-            st.metric("置信度", confidence)
+        # 结果概览：先计算好全部指标，再一次分配列逐个填入
+        results = result.get('results', {})
+        metrics = [
+            ("搜索状态", "✅ 成功" if result.get('success') else "❌ 失败"),
+            ("搜索ID", result.get('search_id', 'N/A')),
+            ("质量评分", f"{results.get('quality_score', 0):.1f}/5.0"),
+            ("置信度", results.get('confidence', 'unknown')),
+        ]
+        for col, (label, value) in zip(st.columns(len(metrics)), metrics):
+            col.metric(label, value)
         
         # 详细结果
         tabs = st.tabs(["📖 最终报告", "🔍 搜索过程", "📊 详细数据", "🔬 质量分析"])
@@ -387,8 +522,10 @@ class StreamlitInterface:
             st.markdown('<div class="result-container">', unsafe_allow_html=True)
             
             # 以JSON格式显示原始数据
-            with st.expander("🗃️ 原始搜索数据"):
-                st.json(result)
+            # JSON树默认折叠，展开前浏览器不必为整个结果构建节点
+            with st.expander("🗃️ 原始搜索数据", expanded=False):
+                # 传入已序列化的字符串，st.json不会再次序列化
+                st.json(_result_json(result.get('search_id', ''), result), expanded=False)
             
             # 智能体执行步骤
             results_data = result.get('results', {})
@@ -444,17 +581,15 @@ class StreamlitInterface:
         """初始化引擎"""
         try:
             with st.spinner("🚀 正在初始化RelicSeek引擎..."):
-                st.session_state.engine = RelicSeekEngine()
+                st.session_state.engine = _get_engine()
                 st.session_state.engine_initialized = True
             
-            st.success("✅ 引擎初始化成功!")
-            st.experimental_rerun()
+            _rerun_app("✅ 引擎初始化成功!")
             
         except Exception as e:
             st.error(f"❌ 引擎初始化失败: {str(e)}")
             st.error("请检查配置文件和环境变量设置")
-            with st.expander("查看详细错误信息"):
-                st.code(traceback.format_exc())
+            _show_traceback(e)
     
     def validate_system_setup(self):
         """验证系统设置"""
@@ -464,7 +599,8 @@ class StreamlitInterface:
         
         try:
             with st.spinner("🔍 正在验证系统设置..."):
-                validation_result = st.session_state.engine.validate_setup()
+                engine = st.session_state.engine
+                validation_result = _cached_validation(id(engine), engine)
             
             st.markdown("### 🔍 系统验证结果")
             
@@ -500,6 +636,11 @@ class StreamlitInterface:
         try:
             with st.spinner("🔄 正在重新加载配置..."):
                 st.session_state.engine.reload_config()
+            _cached_status.clear()
+            _cached_validation.clear()
+            
+            # 配置变化后缓存的结果不再可靠
+            st.session_state.pop('semantic_cache', None)
             
             st.success("✅ 配置重新加载成功!")
             
@@ -508,18 +649,19 @@ class StreamlitInterface:
     
     def clear_session(self):
         """清除会话"""
-        if st.session_state.engine:
-            st.session_state.engine.clear_session(st.session_state.session_id)
+        # 只清除本会话的对话记忆，共用引擎的其他会话不受影响
+        memory = st.session_state.pop('agent_memory', None)
+        if st.session_state.engine and memory is not None:
+            st.session_state.engine.clear_session(st.session_state.session_id, memory)
         
-        # 清除搜索历史
-        st.session_state.search_history = []
+        # 清除搜索历史和语义查询缓存
+        self._reset_history()
+        st.session_state.pop('semantic_cache', None)
         
         # 生成新的会话ID
-        import uuid
         st.session_state.session_id = str(uuid.uuid4())
         
-        st.success("✅ 会话已清除!")
-        st.experimental_rerun()
+        _rerun_app("✅ 会话已清除!")
 
 
 def main():
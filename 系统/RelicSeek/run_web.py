@@ -31,15 +31,23 @@ def main():
     print("💡 提示: 使用 Ctrl+C 停止服务")
     print("-" * 50)
     
-    try:
-        subprocess.run([
-            sys.executable, "-m", "streamlit", "run", "app.py",
-            "--server.headless", "true",
-            "--server.port", "8501",
-            "--server.address", "0.0.0.0"
-        ])
-    except KeyboardInterrupt:
-        print("\n👋 应用已停止")
+    command = [
+        sys.executable, "-m", "streamlit", "run", "app.py",
+        "--server.headless", "true",
+        "--server.port", "8501",
+        "--server.address", "0.0.0.0"
+    ]
+    
+    if os.name == "nt":
+        # Windows上exec会另起进程并让当前进程退出，控制台无法再转发Ctrl+C，仍使用子进程
+        try:
+            subprocess.run(command)
+        except KeyboardInterrupt:
+            print("\n👋 应用已停止")
+    else:
+        # 直接用Streamlit服务替换当前进程，不保留常驻的父进程，信号也直接送达服务
+        sys.stdout.flush()
+        os.execv(sys.executable, command)
 
 if __name__ == "__main__":
     main()
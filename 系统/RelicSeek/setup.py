@@ -2,13 +2,27 @@
 RelicSeek安装脚本
 """
 
+from pathlib import Path
+
 from setuptools import setup, find_packages
 
-with open("README.md", "r", encoding="utf-8") as fh:
+here = Path(__file__).resolve().parent
+
+with open(here / "README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
-with open("requirements.txt", "r", encoding="utf-8") as fh:
-    requirements = [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+
+def read_requirements(path):
+    """读取依赖列表：去掉注释和pip选项行（-r、-e、--index-url等），按出现顺序去重"""
+    requirements = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        requirement = line.split("#", 1)[0].strip()
+        if requirement and not requirement.startswith("-"):
+            requirements.setdefault(requirement, None)
+    return list(requirements)
+
+
+requirements = read_requirements(here / "requirements.txt")
 
 setup(
     name="relicseek",
@@ -36,6 +50,10 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        "speedups": ["orjson>=3.9", "lxml>=4.9", "pyahocorasick>=2.0", "tiktoken>=0.5"],
+        "semantic-cache": ["sentence-transformers>=2.2", "numpy>=1.21"],
+    },
     entry_points={
         "console_scripts": [
             "relicseek=relicseek.interface.cli_app:cli",